@@ -0,0 +1,303 @@
+""" parallel QLearner training runs over a sweep of settings
+
+    a run is a dict of settings (see DEFAULTS: maze, meta parameters,
+    rewards, seed), grid() and random_sweep() build lists of them. sweep()
+    trains the runs on a process pool and yields one result row per run as
+    soon as it is done:
+        success_rate        share of EVAL_EPISODES greedy episodes that
+                            reach the goal
+        steps_to_goal       mean steps of those, None if none made it
+        convergence_episode episode after which the greedy path from the
+                            start did not change any more, None if it
+                            does not reach the goal in the end
+    every worker loads the mazes of the sweep once when it starts (through
+    the maze registry), tasks only carry their settings. runs only depend
+    on their seed, not on the worker or the order they are run in
+    successive_halving() trains all runs in rounds and only goes on with
+    the best ones, resuming them from the Q-tables of the round before
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from maze_agent_access import MazeAgentAccess as Maa, DEFAULT_REWARDS
+from q_learner import QLearner
+import random
+
+# the settings of maze_demo_basic_q_learner
+DEFAULTS = {
+    "maze": "FrozenLake_12x10",
+    "episodes": 1000,
+    "max_steps_factor": 10,
+    "alpha": 0.5,
+    "gamma": 0.5,
+    "epsilon": 0.5,
+    "reward_step": DEFAULT_REWARDS["step"],
+    "reward_wall": DEFAULT_REWARDS["wall"],
+    "reward_hole": DEFAULT_REWARDS["hole"],
+    "reward_goal": DEFAULT_REWARDS["goal"],
+    "reward_shaping": 0,
+    "seed": 0,
+}
+RESULTS = ("success_rate", "steps_to_goal", "convergence_episode")
+# table column widths, the others fit their name (at least 8)
+WIDTHS = {"maze": 17}
+EVAL_EPISODES = 100
+
+# per worker process: maze name -> (training agent, probe agent)
+_agents = {}
+
+
+def grid(**values) -> list[dict]:
+    """ every combination of the given lists of settings, the others
+        from DEFAULTS. ex. grid(alpha=[0.1, 0.5], seed=range(3))
+    """
+    _check(values)
+    names = list(values)
+    return [dict(DEFAULTS, **dict(zip(names, combination)))
+            for combination in product(*values.values())]
+
+
+def random_sweep(count: int, seed: int | None = None,
+                 **ranges) -> list[dict]:
+    """ count runs with settings drawn at random: a (low, high) tuple is
+        drawn uniformly, a list is picked from, the others from DEFAULTS
+        seed only picks the settings, the runs are seeded 0..count-1
+        unless "seed" is one of the ranges
+    """
+    _check(ranges)
+    rng = random.Random(seed)
+    runs = []
+    for number in range(count):
+        run = dict(DEFAULTS, seed=number)
+        for name, values in ranges.items():
+            if isinstance(values, tuple):
+                run[name] = rng.uniform(*values)
+            else:
+                run[name] = rng.choice(list(values))
+        runs.append(run)
+    return runs
+
+
+def _check(settings: dict):
+    unknown = set(settings) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+
+
+def _init_worker(maze_names: list[str]):
+    """ pool initializer, loads the mazes of the sweep once per worker """
+    for maze_name in maze_names:
+        _load(maze_name)
+
+
+def _load(maze_name: str) -> tuple[Maa, Maa]:
+    if maze_name not in _agents:
+        _agents[maze_name] = (Maa(name="Runner", maze_foldername=maze_name),
+                              Maa(name="Probe", maze_foldername=maze_name))
+        for agent in _agents[maze_name]:
+            agent.draw_steps = False
+    return _agents[maze_name]
+
+
+def _greedy_walk(agent: Maa, ql: QLearner, max_steps: int) -> list[int]:
+    """ states the greedy policy visits from the start, up to the goal,
+        a hole or the first state seen before (the policy is stuck then)
+    """
+    agent.reset_to_start()
+    state = agent.state
+    walk = [state]
+    seen = {state}
+    for _ in range(max_steps):
+        action_qs = ql.qtable[state]
+        state, _, done = agent.step(action_qs.index(max(action_qs)))
+        walk.append(state)
+        if done or state in seen:
+            break
+        seen.add(state)
+    return walk
+
+
+def _learner(run: dict, agent: Maa) -> QLearner:
+    return QLearner(filename="not set",
+                    states=agent.states,
+                    actions=agent.actions,
+                    alpha=run["alpha"],
+                    gamma=run["gamma"],
+                    epsilon=run["epsilon"],
+                    seed=run["seed"])
+
+
+def _set_rewards(run: dict, agent: Maa):
+    agent.rewards = {name: run[f"reward_{name}"]
+                     for name in ("step", "wall", "hole", "goal")}
+
+
+def _episode(agent: Maa, ql: QLearner, run: dict):
+    """ one training episode like in maze_demo_basic_q_learner """
+    maze = agent.maze
+    distance_field = maze.distance_field()
+    gamma, shaping = run["gamma"], run["reward_shaping"]
+    agent.reset_to_start()
+    state = agent.state
+    for _ in range(maze.size * run["max_steps_factor"]):
+        action = ql.epsilon_greedy_action(state)
+        new_state, reward, done = agent.step(action)
+        if shaping:
+            reward += shaping * distance_field.shaping_reward(
+                state, new_state, gamma, done)
+        ql.update_q(s=state, a=action, s_next=new_state, reward=reward)
+        state = new_state
+        if done:
+            break
+
+
+def _evaluate(probe: Maa, ql: QLearner, run: dict) -> dict:
+    """ success_rate and steps_to_goal of the greedy policy """
+    maze = probe.maze
+    goal = maze.flatten(*maze.goal)
+    max_steps = maze.size * run["max_steps_factor"]
+    probe.seed(run["seed"], stream=-2)
+    steps = [len(walk) - 1 for walk in
+             (_greedy_walk(probe, ql, max_steps)
+              for _ in range(EVAL_EPISODES))
+             if walk[-1] == goal]
+    return {"success_rate": len(steps) / EVAL_EPISODES,
+            "steps_to_goal": sum(steps) / len(steps) if steps else None}
+
+
+def train(run: dict) -> dict:
+    """ trains one QLearner like maze_demo_basic_q_learner and evaluates
+        its greedy policy, returns the run with the RESULTS added
+    """
+    agent, probe = _load(run["maze"])
+    seed = run["seed"]
+    # epsilon_greedy_action rolls on the global random module
+    random.seed(seed)
+    agent.seed(seed)
+    _set_rewards(run, agent)
+    maze = agent.maze
+    max_steps = maze.size * run["max_steps_factor"]
+    ql = _learner(run, agent)
+
+    last_walk = None
+    convergence_episode = None
+    for episode in range(1, run["episodes"] + 1):
+        _episode(agent, ql, run)
+        # the same hole rolls for every check, only the policy changes
+        probe.seed(seed, stream=-1)
+        walk = _greedy_walk(probe, ql, max_steps)
+        if walk != last_walk:
+            last_walk = walk
+            convergence_episode = episode
+    if last_walk[-1] != maze.flatten(*maze.goal):
+        convergence_episode = None
+    return dict(run, convergence_episode=convergence_episode,
+                **_evaluate(probe, ql, run))
+
+
+def sweep(runs: list[dict], workers: int | None = None):
+    """ trains the runs on a pool of workers (None = one per core) and
+        yields the result rows in the order they finish
+    """
+    maze_names = sorted({run["maze"] for run in runs})
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker,
+                             initargs=(maze_names,)) as pool:
+        futures = [pool.submit(train, run) for run in runs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def train_round(run: dict, qtable: list | None, round_number: int,
+                episodes: int) -> tuple[dict, list]:
+    """ one round of successive_halving(): trains episodes more episodes
+        on top of qtable (None = a fresh table) and evaluates the greedy
+        policy. returns the run with success_rate and steps_to_goal added
+        and the Q-table to resume from in the next round
+        every round rolls on its own streams of the runs seed
+    """
+    agent, probe = _load(run["maze"])
+    seed = run["seed"]
+    random.seed(f"{seed}/{round_number}")
+    agent.seed(seed, stream=round_number)
+    _set_rewards(run, agent)
+    ql = _learner(run, agent)
+    if qtable is not None:
+        ql.qtable = qtable
+    for _ in range(episodes):
+        _episode(agent, ql, run)
+    return dict(run, **_evaluate(probe, ql, run)), ql.qtable
+
+
+def _score(row: dict) -> tuple:
+    """ sort key, best first: high success rate, then few steps """
+    steps = row["steps_to_goal"]
+    return -row["success_rate"], float("inf") if steps is None else steps
+
+
+def successive_halving(runs: list[dict], min_episodes: int = 100,
+                       keep: float = 0.5, workers: int | None = None):
+    """ trains all runs for min_episodes, keeps the best keep share of them
+        and trains those for 1 / keep times as many episodes more, from
+        where their Q-tables left off, and so on until one run is left or
+        the survivors used up their "episodes" setting
+        yields (round number, result rows best first) after every round,
+        the rows have an "episodes_trained" column
+    """
+    if not 0 < keep < 1:
+        raise ValueError("Keep must be a share (0:1)")
+    if min_episodes < 1:
+        raise ValueError("Need at least one episode per round")
+    maze_names = sorted({run["maze"] for run in runs})
+    # candidate number -> (Q-table, episodes trained)
+    state = {number: (None, 0) for number in range(len(runs))}
+    round_episodes = min_episodes
+    round_number = 0
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker,
+                             initargs=(maze_names,)) as pool:
+        while state:
+            futures = {}
+            for number, (qtable, trained) in state.items():
+                episodes = min(round_episodes,
+                               runs[number]["episodes"] - trained)
+                if episodes > 0:
+                    futures[pool.submit(train_round, runs[number], qtable,
+                                        round_number, episodes)] = (
+                        number, trained + episodes)
+            if not futures:
+                return
+            rows = []
+            for future in as_completed(futures):
+                number, trained = futures[future]
+                row, qtable = future.result()
+                state[number] = (qtable, trained)
+                rows.append((number, dict(row, episodes_trained=trained)))
+            # ties go to the earlier run, not the one that finished first
+            rows.sort(key=lambda item: (_score(item[1]), item[0]))
+            yield round_number, [row for _, row in rows]
+            if len(rows) == 1:
+                return
+            survivors = {number for number, _ in
+                         rows[:max(1, round(len(rows) * keep))]}
+            state = {number: state[number] for number in survivors}
+            round_episodes = round(round_episodes / keep)
+            round_number += 1
+
+
+def format_row(row: dict, names: list[str]) -> str:
+    """ one line of a results table, numbers rounded """
+    cells = []
+    for name in names:
+        value = row[name]
+        if isinstance(value, float):
+            value = f"{value:.3f}"
+        cells.append(f"{str(value):>{_width(name)}}")
+    return " ".join(cells)
+
+
+def format_header(names: list[str]) -> str:
+    return " ".join(f"{name:>{_width(name)}}" for name in names)
+
+
+def _width(name: str) -> int:
+    return WIDTHS.get(name, max(len(name), 8))
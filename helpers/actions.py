@@ -0,0 +1,9 @@
+""" the actions an agent can take in a maze
+    ids are shared by the agent interface, the learners and the graph
+    helpers (and re-exported by helpers.maze)
+"""
+
+LEFT, RIGHT, UP, DOWN = range(4)
+ACTION_NAMES = ("left", "right", "up", "down")
+# order of the neighbours in Maze.adjacency() and the searches
+NEIGHBOUR_ORDER = (DOWN, UP, RIGHT, LEFT)
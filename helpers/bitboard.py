@@ -0,0 +1,207 @@
+""" bit packed wall masks of a maze
+
+    every row of passable cells is one python int (bit x set = cell x is
+    passable), so whole rows are handled with a few shift/and/or operations
+    instead of cell by cell:
+        flood fills sweep down and up the rows until nothing changes. a row
+        is filled sideways in one go: adding the seed bits carries them to
+        the right end of their run, shifted ands fill to the left
+        breadth first layers move the frontier of the whole board (all rows
+        in one int, one padding bit per row so shifts don't wrap around)
+        one step in all four directions at once
+    the masks are built in one pass over Maze.wall_plane() and never
+    changed. good for one off checks on big mazes, the incremental indexes
+    (ReachabilityIndex, DistanceField) pay off when the maze keeps changing
+"""
+from __future__ import annotations
+from math import isqrt
+from .actions import ACTION_NAMES, LEFT, RIGHT, UP, DOWN
+
+# wall byte -> binary digit of the passable mask
+_PASSABLE_DIGITS = bytes.maketrans(b"\x00\x01", b"10")
+
+
+def _fill_row(seeds: int, row: int, steps: int) -> int:
+    """ all cells of row that share a run of passable cells with one of
+        the seeds (seeds must be passable)
+        steps = bit length of the row width, enough doublings for the
+        longest run
+    """
+    # to the right: the carry runs through the passable bits of the run
+    # and stops on the wall behind it
+    seeds = (((row + seeds) ^ row) | seeds) & row
+    # to the left: shift by 1, 2, 4, ... through ever longer passable runs
+    shift = 1
+    for _ in range(steps):
+        seeds |= row & (seeds >> shift)
+        row &= row >> shift
+        if not row:
+            break
+        shift <<= 1
+    return seeds
+
+
+def trace_back(layers: list[int], bit: int,
+               stride: int) -> tuple[list[str], int]:
+    """ actions of a shortest way to board bit, found in the breadth first
+        layers before the one holding bit (rows are stride bits apart)
+        returns the actions and the bit the way starts at, in layers[0]
+    """
+    down, up, right, left = (ACTION_NAMES[action]
+                             for action in (DOWN, UP, RIGHT, LEFT))
+    path = []
+    for frontier in reversed(layers):
+        # the cell before is any neighbour one layer closer to the start
+        if bit >= stride and frontier >> (bit - stride) & 1:
+            path.append(down)
+            bit -= stride
+        elif frontier >> (bit + stride) & 1:
+            path.append(up)
+            bit += stride
+        elif bit and frontier >> (bit - 1) & 1:
+            path.append(right)
+            bit -= 1
+        elif frontier >> (bit + 1) & 1:
+            path.append(left)
+            bit += 1
+    path.reverse()
+    return path, bit
+
+
+class BitBoard:
+    """
+    passable cells of one Maze as bit masks, a snapshot of the maze at
+    version self.version. cells are passed as flat indices (see
+    Maze.flatten())
+    """
+
+    def __init__(self, maze):
+        self.maze = maze
+        dim_x, dim_y = maze.dim_x, maze.dim_y
+        walls = maze.wall_plane().tobytes()
+        # binary digits come most significant first, so every row is
+        # reversed to put cell x at bit x
+        digits = [walls[y * dim_x:(y + 1) * dim_x]
+                  .translate(_PASSABLE_DIGITS)[::-1] for y in range(dim_y)]
+        self.rows = [int(row, 2) for row in digits]
+        # the board puts row y at bit y * stride, followed by a zero bit
+        self.stride = dim_x + 1
+        self.board = int(b"".join(b"0" + row for row in reversed(digits)), 2)
+        self.version = maze.version
+        self._steps = dim_x.bit_length()
+
+    def _bit(self, index: int) -> int:
+        """ board bit position of cell index """
+        return index + index // self.maze.dim_x
+
+    def is_passable(self, index: int) -> bool:
+        return bool(self.board >> self._bit(index) & 1)
+
+    def flood(self, index: int, stop: int | None = None) -> list[int]:
+        """ the cells connected to cell index as one int per row
+            all zero if index is a wall. with stop given the fill ends as
+            soon as that cell is reached (the rows are then incomplete)
+        """
+        rows, steps = self.rows, self._steps
+        dim_x, last = self.maze.dim_x, len(rows) - 1
+        x, y = index % dim_x, index // dim_x
+        filled = [0] * len(rows)
+        filled[y] = _fill_row(1 << x & rows[y], rows[y], steps)
+        if stop is not None:
+            stop_x, stop_y = stop % dim_x, stop // dim_x
+
+        changed = True
+        while changed:
+            changed = False
+            for y in range(1, last + 1):
+                seeds = filled[y - 1] & rows[y] | filled[y]
+                if seeds != filled[y]:
+                    filled[y] = _fill_row(seeds, rows[y], steps)
+                    changed = True
+            for y in range(last - 1, -1, -1):
+                seeds = filled[y + 1] & rows[y] | filled[y]
+                if seeds != filled[y]:
+                    filled[y] = _fill_row(seeds, rows[y], steps)
+                    changed = True
+            if stop is not None and filled[stop_y] >> stop_x & 1:
+                break
+        return filled
+
+    def reachable(self, a: int, b: int) -> bool:
+        """ True if there is a path between the cells a and b """
+        if not (self.is_passable(a) and self.is_passable(b)):
+            return False
+        dim_x = self.maze.dim_x
+        filled = self.flood(a, stop=b)
+        return bool(filled[b // dim_x] >> b % dim_x & 1)
+
+    def _expand(self, frontier: int) -> int:
+        """ the cells one step away from frontier, walls not removed """
+        stride = self.stride
+        return (frontier << stride | frontier >> stride
+                | frontier << 1 | frontier >> 1)
+
+    def layers(self, index: int):
+        """ yields the breadth first frontiers around cell index as board
+            ints (see _bit()), the first one holds cell index alone
+        """
+        frontier = 1 << self._bit(index) & self.board
+        unseen = self.board ^ frontier
+        while frontier:
+            yield frontier
+            frontier = self._expand(frontier) & unseen
+            unseen ^= frontier
+
+    def distance(self, a: int, b: int) -> int:
+        """ number of steps on a shortest path from cell a to cell b,
+            -1 if there is no way
+        """
+        target = 1 << self._bit(b)
+        for steps, frontier in enumerate(self.layers(a)):
+            if frontier & target:
+                return steps
+        return -1
+
+    def shortest_path(self, start: int, goal: int) -> tuple[list | None,
+                                                           int]:
+        """ breadth first search one layer at a time, returns
+            (path, expanded) like the searches in helpers.pathfinding
+            (expanded = cells in the layers before the goals)
+            only every few layers are kept (about sqrt(rows + columns)
+            apart), the ones in between are redone while walking back
+        """
+        if start == goal:
+            return [], 1
+        spacing = isqrt(self.maze.dim_x + self.maze.dim_y) + 1
+        stride, board = self.stride, self.board
+        target = 1 << self._bit(goal)
+        frontier = 1 << self._bit(start) & board
+        unseen = board ^ frontier
+        checkpoints = []
+        expanded = 0
+        depth = 0
+        while not frontier & target:
+            if not frontier:
+                return None, max(expanded, 1)
+            if depth % spacing == 0:
+                checkpoints.append((frontier, unseen))
+            expanded += frontier.bit_count()
+            frontier = self._expand(frontier) & unseen
+            unseen ^= frontier
+            depth += 1
+
+        # back from the goal, one stretch between checkpoints at a time
+        stretches = []
+        bit = self._bit(goal)
+        for number in reversed(range(len(checkpoints))):
+            frontier, unseen = checkpoints[number]
+            segment = [frontier]
+            for _ in range(number * spacing + 1,
+                           min((number + 1) * spacing, depth)):
+                frontier = self._expand(frontier) & unseen
+                unseen ^= frontier
+                segment.append(frontier)
+            steps, bit = trace_back(segment, bit, stride)
+            stretches.append(steps)
+        return [step for steps in reversed(stretches) for step in steps], \
+            expanded
@@ -0,0 +1,211 @@
+""" breadth first distances from every cell to the goal of a maze
+
+    the field is an int32 array (-1 for walls and cells that can't reach
+    the goal). wall edits only repair the cells whose distance changes:
+        an opened cell takes the best distance of its neighbours and
+        spreads any improvement outwards
+        a closed cell invalidates the cells that were only reached through
+        it (no neighbour one step closer to the goal left), only those
+        are given new distances from the valid cells around them
+    moving the goal changes every distance, the field is then rebuilt on
+    the next query
+"""
+from __future__ import annotations
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+from .actions import ACTION_NAMES, LEFT, RIGHT, UP, DOWN
+
+UNREACHABLE = -1
+
+
+class DistanceField:
+    """
+    distances to the goal of one Maze, kept up to date on edits
+    """
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.rebuild()
+
+    def _neighbours(self, index: int) -> list[tuple[int, int]]:
+        """ (cell, action) pairs of the passable cells next to index,
+            action being the move from index to the cell
+        """
+        maze = self.maze
+        dim_x, size = maze.dim_x, maze.size
+        x = index % dim_x
+        neighbours = []
+        if index + dim_x < size:
+            neighbours.append((index + dim_x, DOWN))
+        if index >= dim_x:
+            neighbours.append((index - dim_x, UP))
+        if x < dim_x - 1:
+            neighbours.append((index + 1, RIGHT))
+        if x > 0:
+            neighbours.append((index - 1, LEFT))
+        return [(n, action) for n, action in neighbours
+                if not maze.is_wall_index(n)]
+
+    def rebuild(self):
+        """ one breadth first search from the goal """
+        maze = self.maze
+        offsets, targets, _ = maze.adjacency()
+        self.goal = maze.flatten(*maze.goal)
+        self.distances = array("i", [UNREACHABLE]) * maze.size
+        distances = self.distances
+        distances[self.goal] = 0
+        queue = deque([self.goal])
+        while queue:
+            node = queue.popleft()
+            distance = distances[node] + 1
+            for i in range(offsets[node], offsets[node + 1]):
+                target = targets[i]
+                if distances[target] == UNREACHABLE:
+                    distances[target] = distance
+                    queue.append(target)
+        self.version = maze.version
+        self._stale = False
+
+    def _spread(self, queue: deque):
+        """ passes improved distances on from the cells in queue """
+        distances = self.distances
+        while queue:
+            node = queue.popleft()
+            distance = distances[node] + 1
+            for target, _ in self._neighbours(node):
+                if (distances[target] == UNREACHABLE
+                        or distances[target] > distance):
+                    distances[target] = distance
+                    queue.append(target)
+
+    def _opened(self, index: int):
+        """ a wall at index became passable """
+        distances = self.distances
+        known = [distances[n] for n, _ in self._neighbours(index)
+                 if distances[n] != UNREACHABLE]
+        if not known:
+            return
+        distances[index] = min(known) + 1
+        self._spread(deque([index]))
+
+    def _closed(self, index: int):
+        """ a passable cell at index became a wall """
+        distances = self.distances
+        old = distances[index]
+        distances[index] = UNREACHABLE
+        if old == UNREACHABLE:
+            return
+
+        # collect the cells that lost their last neighbour one step
+        # closer to the goal, level by level
+        invalid = set()
+        queue = deque(n for n, _ in self._neighbours(index)
+                      if distances[n] == old + 1)
+        seen = set(queue)
+        while queue:
+            node = queue.popleft()
+            distance = distances[node]
+            supported = any(
+                distances[n] == distance - 1 and n not in invalid
+                for n, _ in self._neighbours(node))
+            if supported:
+                continue
+            invalid.add(node)
+            for n, _ in self._neighbours(node):
+                if distances[n] == distance + 1 and n not in seen:
+                    seen.add(n)
+                    queue.append(n)
+        if not invalid:
+            return
+
+        # new distances for the invalid cells, starting from the valid
+        # cells they touch. a small dijkstra, as the starting distances
+        # differ
+        for node in invalid:
+            distances[node] = UNREACHABLE
+        horizon = []
+        for node in invalid:
+            known = [distances[n] for n, _ in self._neighbours(node)
+                     if n not in invalid and distances[n] != UNREACHABLE]
+            if known:
+                heappush(horizon, (min(known) + 1, node))
+        while horizon:
+            distance, node = heappop(horizon)
+            if (distances[node] != UNREACHABLE
+                    and distances[node] <= distance):
+                continue
+            distances[node] = distance
+            for n, _ in self._neighbours(node):
+                if n in invalid and (distances[n] == UNREACHABLE
+                                     or distances[n] > distance + 1):
+                    heappush(horizon, (distance + 1, n))
+
+    def cell_changed(self, index: int | None, was_wall: bool | None):
+        """ follow up on an edit of the maze (see Maze._edited())
+            index is None for edits that do not touch the grid
+        """
+        maze = self.maze
+        if self._stale or self.version != maze.version - 1:
+            # missed an edit somewhere, rebuild when asked next
+            self._stale = True
+            return
+        if maze.flatten(*maze.goal) != self.goal:
+            self._stale = True
+            return
+        if index is not None:
+            is_wall = maze.is_wall_index(index)
+            if was_wall and not is_wall:
+                self._opened(index)
+            elif is_wall and not was_wall:
+                self._closed(index)
+        self.version = maze.version
+
+    def field(self) -> array:
+        """ the distances as int32 array in flat index order
+            (-1 = can't reach the goal). do not change it
+        """
+        if self._stale or self.version != self.maze.version:
+            self.rebuild()
+        return self.distances
+
+    def distance(self, index: int) -> int:
+        """ steps from cell index to the goal, -1 if there is no way """
+        return self.field()[index]
+
+    def path_from(self, index: int) -> list | None:
+        """ a shortest path from cell index to the goal as action strings,
+            found by stepping downhill, O(path length)
+            None if the goal can't be reached from there
+        """
+        distances = self.field()
+        if distances[index] == UNREACHABLE:
+            return None
+        path = []
+        while distances[index] > 0:
+            for target, action in self._neighbours(index):
+                if distances[target] == distances[index] - 1:
+                    path.append(ACTION_NAMES[action])
+                    index = target
+                    break
+        return path
+
+    def potential(self, index: int) -> float:
+        """ shaping potential of a cell: minus its distance to the goal
+            cells that can't reach the goal get the lowest potential
+        """
+        distance = self.field()[index]
+        if distance == UNREACHABLE:
+            return -float(self.maze.size)
+        return -float(distance)
+
+    def shaping_reward(self, state: int, next_state: int, gamma: float,
+                       done: bool = False) -> float:
+        """ potential based shaping term gamma * P(s') - P(s) for the move
+            state -> next_state. added to the reward it speeds up learning
+            without changing which policy is optimal
+            done (goal or hole reached) ends the episode, P(s') is 0 then
+        """
+        if done:
+            return -self.potential(state)
+        return gamma * self.potential(next_state) - self.potential(state)
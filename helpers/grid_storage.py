@@ -0,0 +1,215 @@
+""" storage engines for the maze grid
+
+    CellStorage keeps one GridCell object per cell (the original layout)
+    ArrayStorage keeps two flat planes instead:
+        walls - bytearray, one uint8 per cell (1 = wall)
+        holes - array("f"), one float32 hole probability per cell
+    both share the same small interface, so Maze does not need to know
+    which one it is talking to
+"""
+from array import array
+from functools import lru_cache
+from .grid_cell import GridCell
+
+
+def _float32_to_float(value: float) -> float:
+    """ float32 can't hold 0.1 exactly. rounding to the 7 significant digits
+        float32 can carry gives back the value that was stored
+    """
+    return float(f"{value:.7g}")
+
+
+@lru_cache(maxsize=1024)
+def hole_chance_from_plane(value: float) -> float:
+    """ the hole chance that was stored as value in a hole_plane(), for
+        bulk reads of the plane. mazes use a handful of distinct chances,
+        each one is converted once
+    """
+    if value == 0:
+        return 0
+    return _float32_to_float(value)
+
+
+class PlaneGridCell(GridCell):
+    """
+    GridCell look-alike that reads and writes through to an ArrayStorage
+    created on demand by ArrayStorage.cell(), so the planes stay the only
+    truth
+    """
+
+    def __init__(self, storage: "ArrayStorage", index: int):
+        # GridCell.__init__ is skipped on purpose, it would reset the cell
+        self._storage = storage
+        self._index = index
+
+    @property
+    def is_wall(self) -> bool:
+        return self._storage.is_wall(self._index)
+
+    @is_wall.setter
+    def is_wall(self, is_wall: bool):
+        self._storage.set_wall(self._index, is_wall)
+
+    @property
+    def hole_chance(self) -> float:
+        return self._storage.hole_chance(self._index)
+
+    @hole_chance.setter
+    def hole_chance(self, hole_chance: float):
+        self._storage.set_hole_chance(self._index, hole_chance)
+
+
+class CellStorage:
+    """
+    one GridCell object per cell
+    """
+    kind = "cells"
+
+    def __init__(self, size: int, *, cells=None):
+        if cells is None:
+            cells = tuple(GridCell() for _ in range(size))
+        if len(cells) != size:
+            raise ValueError("Cell count does not match the grid size")
+        self.cells = cells
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __getitem__(self, index: int) -> GridCell:
+        return self.cells[index]
+
+    def cell(self, index: int) -> GridCell:
+        return self.cells[index]
+
+    def is_wall(self, index: int) -> bool:
+        return self.cells[index].is_wall
+
+    def set_wall(self, index: int, is_wall: bool):
+        self.cells[index].is_wall = is_wall
+
+    def hole_chance(self, index: int) -> float:
+        return self.cells[index].hole_chance
+
+    def copy(self) -> "CellStorage":
+        """ deep copy, every cell is duplicated """
+        return CellStorage(len(self.cells), cells=tuple(
+            GridCell(is_wall=cell.is_wall, hole_chance=cell.hole_chance)
+            for cell in self.cells))
+
+    def set_hole_chance(self, index: int, hole_chance: float):
+        self.cells[index].hole_chance = hole_chance
+
+    def wall_plane(self) -> memoryview:
+        """ snapshot of the walls as one byte per cell """
+        return memoryview(
+            bytearray(cell.is_wall for cell in self.cells)).toreadonly()
+
+    def hole_plane(self) -> memoryview:
+        """ snapshot of the hole chances as one float32 per cell """
+        return memoryview(
+            array("f", (cell.hole_chance for cell in self.cells))
+        ).toreadonly()
+
+
+class ArrayStorage:
+    """
+    flat wall (uint8) and hole probability (float32) planes
+    """
+    kind = "array"
+
+    def __init__(self, size: int, *, walls=None, holes=None, keep=None):
+        """ walls and holes can be handed in as ready made planes
+            (any writable buffer of size uint8 / float32 items), keep holds
+            on to whatever owns them (ex. a memory map)
+        """
+        if walls is None:
+            walls = bytearray(size)
+        if holes is None:
+            holes = array("f", bytes(4 * size))
+        if len(walls) != size or len(holes) != size:
+            raise ValueError("Plane sizes do not match the grid size")
+        self.walls = walls
+        self.holes = holes
+        self._keep = keep
+
+    def __len__(self) -> int:
+        return len(self.walls)
+
+    def __getitem__(self, index: int) -> GridCell:
+        if index < 0 or index >= len(self.walls):
+            raise IndexError("cell index out of range")
+        return PlaneGridCell(self, index)
+
+    def cell(self, index: int) -> GridCell:
+        return PlaneGridCell(self, index)
+
+    def is_wall(self, index: int) -> bool:
+        return self.walls[index] != 0
+
+    def set_wall(self, index: int, is_wall: bool):
+        # same rules as GridCell: walls override holes
+        if is_wall:
+            self.holes[index] = 0
+        self.walls[index] = 1 if is_wall else 0
+
+    def hole_chance(self, index: int) -> float:
+        return hole_chance_from_plane(self.holes[index])
+
+    def copy(self) -> "ArrayStorage":
+        """ copy into fresh, owned planes (also detaches from memory maps)
+        """
+        holes = array("f")
+        holes.frombytes(memoryview(self.holes).cast("B"))
+        return ArrayStorage(len(self.walls),
+                            walls=bytearray(self.walls),
+                            holes=holes)
+
+    def detach(self):
+        """ moves planes that live in a memory map (see maze_binary.load())
+            into owned ones and closes the map, so the file can be replaced
+        """
+        if self._keep is None:
+            return
+        owned = self.copy()
+        old_planes = (self.walls, self.holes)
+        self.walls, self.holes = owned.walls, owned.holes
+        keep, self._keep = self._keep, None
+        try:
+            for plane in old_planes:
+                if isinstance(plane, memoryview):
+                    plane.release()
+            keep.close()
+        except BufferError:
+            # views from wall_plane() / hole_plane() are still around, the
+            # map is closed once they are gone
+            pass
+
+    def set_hole_chance(self, index: int, hole_chance: float):
+        if hole_chance < 0 or hole_chance > 1:
+            raise ValueError("hole_chance should be a probability [0,1]")
+        if hole_chance > 0:
+            self.walls[index] = 0
+        self.holes[index] = hole_chance
+
+    def wall_plane(self) -> memoryview:
+        """ live, read-only view of the walls, one byte per cell """
+        return memoryview(self.walls).toreadonly()
+
+    def hole_plane(self) -> memoryview:
+        """ live, read-only view of the hole chances, one float32 per cell """
+        return memoryview(self.holes).toreadonly()
+
+
+STORAGES = {
+    CellStorage.kind: CellStorage,
+    ArrayStorage.kind: ArrayStorage,
+}
+
+
+def make_storage(kind: str, size: int):
+    """ factory for the storage engines by name ("cells" or "array")
+    """
+    try:
+        return STORAGES[kind](size)
+    except KeyError:
+        raise ValueError(f"Unknown grid storage: {kind}") from None
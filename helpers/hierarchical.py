@@ -0,0 +1,411 @@
+""" hierarchical pathfinding over clusters of a maze
+
+    the grid is cut into square clusters. where two clusters touch, every
+    run of cells passable on both sides of the border is an entrance, one
+    pair of cells (two for long runs) connects the clusters there. the
+    entrance cells are the nodes of a small abstract graph:
+        inter edges (cost 1) cross a border between an entrance pair
+        intra edges join the entrance cells of one cluster, their cost is
+        the breadth first distance inside the cluster
+    the intra distances of a cluster are found with one search per pair
+    and kept until an edit touches the cluster
+    a query links start and goal to the entrance cells of their own
+    clusters only, runs A* on the abstract graph and refines each edge
+    into steps with a search inside one cluster (straight moves in a
+    cluster without walls). the A* heuristic is weighted by
+    HEURISTIC_WEIGHT, which cuts the nodes expanded on walled mazes many
+    times over for paths a few percent longer. paths stay within
+    HEURISTIC_WEIGHT times the shortest abstract path, the far side of a
+    cluster is only reached via its entrances
+    searches inside a cluster run a breadth first layer at a time on its
+    passable cells as one bit mask (like helpers.bitboard)
+    wall edits only mark the edited cells cluster (and the border it sits
+    on) dirty, those are rebuilt on the next query
+"""
+from __future__ import annotations
+from heapq import heappush, heappop
+from .actions import ACTION_NAMES, LEFT, RIGHT, UP, DOWN
+from .bitboard import trace_back, _PASSABLE_DIGITS
+
+CLUSTER_SIZE = 32
+# runs of at least this many cells get an entrance pair at both ends
+LONG_ENTRANCE = 6
+# the A* heuristic is scaled by this, 1 for the shortest abstract paths
+HEURISTIC_WEIGHT = 1.2
+# border of a cluster with its right / lower neighbour
+RIGHT_BORDER, LOWER_BORDER = 0, 1
+
+
+class HierarchicalPathfinder:
+    """
+    cluster graph of one Maze, kept up to date on edits
+    cells are passed as flat indices (see Maze.flatten())
+    """
+
+    def __init__(self, maze, cluster_size: int = CLUSTER_SIZE):
+        if cluster_size < 2:
+            raise ValueError("Clusters must be at least 2 x 2 cells")
+        self.maze = maze
+        self.cluster_size = cluster_size
+        self.columns = -(-maze.dim_x // cluster_size)
+        self.rows = -(-maze.dim_y // cluster_size)
+        self._stride = cluster_size + 1
+        self.rebuild()
+
+    def rebuild(self):
+        """ drops everything, the clusters are rebuilt on the next query
+        """
+        clusters = range(self.columns * self.rows)
+        # passable cells of each cluster as bit mask, see _layers()
+        self._boards = {}
+        # (cluster, RIGHT_BORDER / LOWER_BORDER) -> [(cell, cell across)]
+        self._transitions = {}
+        # entrance cell -> cells across the border
+        self._across = {}
+        # cluster -> {mask bit: entrance cell} (see _targets())
+        self._nodes = {}
+        # entrance cell -> [(entrance cell, cost, x, y)], intra and inter
+        # edges, x and y of the target for the A* heuristic
+        self._edges = {}
+        # cluster -> {(cell, cell): actions}, refined intra edges
+        self._segments = {}
+        # cluster -> True if it has no walls
+        self._open = {}
+        self._dirty_clusters = set(clusters)
+        self._dirty_borders = {
+            (cluster, side) for cluster in clusters
+            for side in (RIGHT_BORDER, LOWER_BORDER)
+            if self._neighbour(cluster, side) is not None}
+        self.version = self.maze.version
+
+    @property
+    def entrances(self) -> int:
+        """ number of entrance cells, the nodes of the abstract graph """
+        return len(self._edges)
+
+    def cluster_of(self, index: int) -> int:
+        dim_x, size = self.maze.dim_x, self.cluster_size
+        return (index // dim_x // size) * self.columns + index % dim_x // size
+
+    def _bounds(self, cluster: int) -> tuple[int, int, int, int]:
+        """ left, top, width, height of a cluster in cells """
+        size = self.cluster_size
+        left = cluster % self.columns * size
+        top = cluster // self.columns * size
+        return (left, top, min(size, self.maze.dim_x - left),
+                min(size, self.maze.dim_y - top))
+
+    def _neighbour(self, cluster: int, side: int) -> int | None:
+        """ the cluster across the border on side (RIGHT_BORDER /
+            LOWER_BORDER), None at the edge of the maze
+        """
+        if side == RIGHT_BORDER:
+            if cluster % self.columns == self.columns - 1:
+                return None
+            return cluster + 1
+        if cluster // self.columns == self.rows - 1:
+            return None
+        return cluster + self.columns
+
+    def _bit(self, cluster: int, index: int) -> int:
+        """ bit of cell index in the mask of cluster """
+        left, top, _, _ = self._bounds(cluster)
+        dim_x = self.maze.dim_x
+        return (index // dim_x - top) * self._stride + index % dim_x - left
+
+    # -- building ----------------------------------------------------------
+
+    def _border_cells(self, cluster: int,
+                      side: int) -> list[tuple[int, int]]:
+        """ the cell pairs facing each other across a border, in order
+        """
+        dim_x = self.maze.dim_x
+        left, top, width, height = self._bounds(cluster)
+        if side == RIGHT_BORDER:
+            x = left + width - 1
+            return [(y * dim_x + x, y * dim_x + x + 1)
+                    for y in range(top, top + height)]
+        y = top + height - 1
+        return [(y * dim_x + x, (y + 1) * dim_x + x)
+                for x in range(left, left + width)]
+
+    def _build_border(self, border: tuple[int, int]):
+        """ finds the entrances along one border, replacing the old ones
+        """
+        maze, across = self.maze, self._across
+        for a, b in self._transitions.pop(border, []):
+            across[a].remove(b)
+            across[b].remove(a)
+            if not across[a]:
+                del across[a]
+            if not across[b]:
+                del across[b]
+        transitions = []
+        run = []
+        for a, b in self._border_cells(*border) + [(None, None)]:
+            if a is not None and not (maze.is_wall_index(a)
+                                      or maze.is_wall_index(b)):
+                run.append((a, b))
+                continue
+            if len(run) >= LONG_ENTRANCE:
+                transitions += [run[0], run[-1]]
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = []
+        for a, b in transitions:
+            across.setdefault(a, []).append(b)
+            across.setdefault(b, []).append(a)
+        self._transitions[border] = transitions
+
+    def _entrances(self, cluster: int) -> set[int]:
+        """ entrance cells of a cluster, from the borders on all sides """
+        cells = set()
+        for side in (RIGHT_BORDER, LOWER_BORDER):
+            cells.update(a for a, _ in
+                         self._transitions.get((cluster, side), []))
+        if cluster % self.columns:
+            cells.update(b for _, b in
+                         self._transitions.get((cluster - 1, RIGHT_BORDER),
+                                               []))
+        if cluster >= self.columns:
+            cells.update(b for _, b in
+                         self._transitions.get((cluster - self.columns,
+                                                LOWER_BORDER), []))
+        return cells
+
+    def _build_cluster(self, cluster: int):
+        """ passable mask and intra edges of one cluster """
+        walls = self.maze.wall_plane()
+        left, top, width, height = self._bounds(cluster)
+        dim_x, stride = self.maze.dim_x, self._stride
+        board = 0
+        for y in range(height):
+            row = (top + y) * dim_x + left
+            # binary digits come most significant first, cell x at bit x
+            digits = bytes(walls[row:row + width]).translate(
+                _PASSABLE_DIGITS)[::-1]
+            board |= int(digits, 2) << (y * stride)
+        self._boards[cluster] = board
+        self._open[cluster] = board == self._full_board(width, height)
+        edges = self._edges
+        for cell in self._nodes.get(cluster, {}).values():
+            del edges[cell]
+        nodes = self._targets(cluster, self._entrances(cluster))
+        # distances are symmetric: each cell searches for the cells after
+        # it and fills in both directions
+        distances = {cell: {} for cell in nodes.values()}
+        remaining = dict(nodes)
+        for bit, cell in nodes.items():
+            del remaining[bit]
+            if not remaining:
+                break
+            for other, distance in self._distances(cluster, cell,
+                                                   remaining).items():
+                distances[cell][other] = distance
+                distances[other][cell] = distance
+        for cell in nodes.values():
+            edges[cell] = self._with_xy(list(distances[cell].items()) + [
+                (other, 1) for other in self._across.get(cell, [])])
+        self._nodes[cluster] = nodes
+        self._segments[cluster] = {}
+
+    def _with_xy(self, edges) -> list[tuple]:
+        """ (cell, cost) edges as (cell, cost, x, y) """
+        dim_x = self.maze.dim_x
+        return [(cell, cost, cell % dim_x, cell // dim_x)
+                for cell, cost in edges]
+
+    def _full_board(self, width: int, height: int) -> int:
+        """ mask of a cluster of width x height without walls """
+        row = (1 << width) - 1
+        return sum(row << (y * self._stride) for y in range(height))
+
+    def _refresh(self):
+        """ rebuilds what the edits since the last query touched
+        """
+        if self.version != self.maze.version:
+            # edits this instance was not told about
+            self.rebuild()
+        for border in self._dirty_borders:
+            self._build_border(border)
+            self._dirty_clusters.add(border[0])
+            self._dirty_clusters.add(self._neighbour(*border))
+        self._dirty_borders = set()
+        for cluster in self._dirty_clusters:
+            self._build_cluster(cluster)
+        self._dirty_clusters = set()
+
+    def cell_changed(self, index: int | None, was_wall: bool | None):
+        """ follow up on an edit of the maze (see Maze._edited())
+            index is None for edits that do not touch the grid
+        """
+        maze = self.maze
+        if self.version != maze.version - 1:
+            self.rebuild()
+            return
+        self.version = maze.version
+        if index is None or maze.is_wall_index(index) == was_wall:
+            return
+        cluster = self.cluster_of(index)
+        self._dirty_clusters.add(cluster)
+        left, top, width, height = self._bounds(cluster)
+        x, y = index % maze.dim_x, index // maze.dim_x
+        borders = []
+        if x == left + width - 1:
+            borders.append((cluster, RIGHT_BORDER))
+        if x == left and cluster % self.columns:
+            borders.append((cluster - 1, RIGHT_BORDER))
+        if y == top + height - 1:
+            borders.append((cluster, LOWER_BORDER))
+        if y == top and cluster >= self.columns:
+            borders.append((cluster - self.columns, LOWER_BORDER))
+        self._dirty_borders.update(
+            border for border in borders
+            if self._neighbour(*border) is not None)
+
+    # -- searching ---------------------------------------------------------
+
+    def _layers(self, cluster: int, cell: int):
+        """ yields the breadth first frontiers around cell, not leaving
+            cluster. same layout as helpers.bitboard: row y of the cluster
+            at bit y * stride, the padding bits behind it stay 0
+        """
+        board, stride = self._boards[cluster], self._stride
+        frontier = 1 << self._bit(cluster, cell) & board
+        unseen = board ^ frontier
+        while frontier:
+            yield frontier
+            frontier = (frontier << stride | frontier >> stride
+                        | frontier << 1 | frontier >> 1) & unseen
+            unseen ^= frontier
+
+    def _targets(self, cluster: int, cells) -> dict[int, int]:
+        """ {cluster mask bit: cell} for cells inside cluster """
+        left, top, _, _ = self._bounds(cluster)
+        dim_x, stride = self.maze.dim_x, self._stride
+        return {1 << ((cell // dim_x - top) * stride + cell % dim_x - left):
+                cell for cell in cells}
+
+    def _distances(self, cluster: int, cell: int,
+                   targets: dict[int, int]) -> dict[int, int]:
+        """ distances from cell to the targets (see _targets()) it reaches
+            inside cluster
+        """
+        remaining = sum(targets)
+        distances = {}
+        for distance, frontier in enumerate(self._layers(cluster, cell)):
+            hits = frontier & remaining
+            if not hits:
+                continue
+            remaining ^= hits
+            while hits:
+                bit = hits & -hits
+                distances[targets[bit]] = distance
+                hits ^= bit
+            if not remaining:
+                break
+        return distances
+
+    def _segment(self, cluster: int, a: int, b: int) -> list[str]:
+        """ actions of a shortest way from cell a to cell b inside cluster
+        """
+        if self._open[cluster]:
+            # no walls: across, then up or down
+            dim_x = self.maze.dim_x
+            dx = b % dim_x - a % dim_x
+            dy = b // dim_x - a // dim_x
+            return ([ACTION_NAMES[RIGHT if dx > 0 else LEFT]] * abs(dx)
+                    + [ACTION_NAMES[DOWN if dy > 0 else UP]] * abs(dy))
+        # _layers() inlined, this runs for every cluster a path crosses
+        board, stride = self._boards[cluster], self._stride
+        bit = self._bit(cluster, b)
+        frontier = 1 << self._bit(cluster, a)
+        unseen = board ^ frontier
+        layers = []
+        while frontier and not frontier >> bit & 1:
+            layers.append(frontier)
+            frontier = (frontier << stride | frontier >> stride
+                        | frontier << 1 | frontier >> 1) & unseen
+            unseen ^= frontier
+        path, _ = trace_back(layers, bit, stride)
+        return path
+
+    def find_path(self, start: int, goal: int) -> tuple[list | None, int]:
+        """ path from cell start to cell goal, returns (path, expanded)
+            like the searches in helpers.pathfinding, expanded counting
+            abstract nodes
+        """
+        self._refresh()
+        if start == goal:
+            return [], 1
+        maze = self.maze
+        if maze.is_wall_index(start) or maze.is_wall_index(goal):
+            return None, 1
+
+        dim_x = maze.dim_x
+        goal_x, goal_y = goal % dim_x, goal // dim_x
+        start_cluster = self.cluster_of(start)
+        goal_cluster = self.cluster_of(goal)
+        # start and goal join the graph for this query only
+        targets = self._nodes[start_cluster]
+        if start_cluster == goal_cluster:
+            targets = dict(targets)
+            targets.update(self._targets(start_cluster, [goal]))
+        first = list(self._distances(start_cluster, start, targets).items())
+        first += [(other, 1) for other in self._across.get(start, [])]
+        first = self._with_xy(first)
+        last = self._distances(goal_cluster, goal, self._nodes[goal_cluster])
+
+        edges_of = self._edges
+        weight = HEURISTIC_WEIGHT
+        parents = {start: start}
+        costs = {start: 0}
+        closed = set()
+        # ties go to the node closer to the goal
+        horizon = [(0, 0, start)]
+        expanded = 0
+        while horizon:
+            _, _, node = heappop(horizon)
+            if node in closed:
+                continue
+            closed.add(node)
+            expanded += 1
+            if node == goal:
+                return self._refine(parents, start, goal), expanded
+            edges = first if node == start else edges_of[node]
+            if node in last:
+                edges = edges + [(goal, last[node], goal_x, goal_y)]
+            cost_here = costs[node]
+            for target, step, x, y in edges:
+                cost = cost_here + step
+                if cost < costs.get(target, cost + 1):
+                    costs[target] = cost
+                    parents[target] = node
+                    # manhattan distance, never more than the real cost
+                    remaining = abs(x - goal_x) + abs(y - goal_y)
+                    heappush(horizon, (cost + weight * remaining,
+                                       remaining, target))
+        return None, expanded
+
+    def _refine(self, parents: dict, start: int, goal: int) -> list[str]:
+        """ turns the abstract path into single steps """
+        cells = [goal]
+        while cells[-1] != start:
+            cells.append(parents[cells[-1]])
+        cells.reverse()
+
+        dim_x = self.maze.dim_x
+        moves = {1: RIGHT, -1: LEFT, dim_x: DOWN, -dim_x: UP}
+        path = []
+        for a, b in zip(cells, cells[1:]):
+            cluster = self.cluster_of(a)
+            if cluster != self.cluster_of(b):
+                path.append(ACTION_NAMES[moves[b - a]])
+            elif a == start or b == goal:
+                path += self._segment(cluster, a, b)
+            else:
+                segments = self._segments[cluster]
+                if (a, b) not in segments:
+                    segments[(a, b)] = self._segment(cluster, a, b)
+                path += segments[(a, b)]
+        return path
@@ -0,0 +1,97 @@
+""" seeded random numbers for the hole rolls of an environment
+
+    hole rolls used to call the global random.random(), so runs on mazes
+    with holes could not be repeated. a HoleRNG belongs to one environment
+    (agent), is seeded, and draws its uniforms a block at a time.
+    sub-streams are derived from (seed, stream) alone: hand episode or
+    environment k stream k and its rolls are the same no matter how many
+    workers share the work, or which worker gets it
+"""
+from __future__ import annotations
+import random
+from itertools import repeat, starmap
+
+BLOCK_SIZE = 4096
+
+
+class HoleRNG:
+    """
+    block buffered stream of uniforms in [0, 1)
+    """
+
+    def __init__(self, seed: int | None = None, stream: int = 0,
+                 block_size: int = BLOCK_SIZE):
+        """ seed None picks a fresh seed (kept in self.seed, so the run
+            can be repeated)
+        """
+        if block_size < 1:
+            raise ValueError("Block size must be at least 1")
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        self.stream = stream
+        self.block_size = block_size
+        # string seeds are hashed (sha512), every (seed, stream) pair
+        # gives an unrelated generator
+        self._random = random.Random(f"{seed}/{stream}")
+        self._next = iter(()).__next__
+        # uniforms handed out so far
+        self.draws = 0
+        # generator state before the current block and the draw it
+        # started at, enough to rebuild the block (see getstate())
+        self._block_state = None
+        self._block_start = 0
+
+    def _refill(self):
+        self._block_state = self._random.getstate()
+        self._block_start = self.draws
+        block = starmap(self._random.random, repeat((), self.block_size))
+        self._next = iter(list(block)).__next__
+
+    def random(self) -> float:
+        """ the next uniform of the stream """
+        try:
+            value = self._next()
+        except StopIteration:
+            self._refill()
+            value = self._next()
+        self.draws += 1
+        return value
+
+    def roll(self, chance: float) -> bool:
+        """ True with probability chance. cells without a hole chance
+            don't use up a number
+        """
+        return chance > 0 and self.random() <= chance
+
+    def getstate(self) -> dict:
+        """ position in the stream, made of plain ints and lists (can be
+            stored as JSON), see setstate()
+        """
+        block = None
+        if self._block_state is not None:
+            version, internal, gauss = self._block_state
+            block = [version, list(internal), gauss]
+        return {"seed": self.seed, "stream": self.stream,
+                "block_size": self.block_size, "block": block,
+                "used": self.draws - self._block_start,
+                "draws": self.draws}
+
+    def setstate(self, state: dict):
+        """ continues exactly where getstate() was taken """
+        self.__init__(state["seed"], state["stream"], state["block_size"])
+        if state["block"] is not None:
+            version, internal, gauss = state["block"]
+            self._random.setstate((version, tuple(internal), gauss))
+            self._refill()
+            for _ in range(state["used"]):
+                self._next()
+        self.draws = state["draws"]
+        self._block_start = self.draws - state["used"]
+
+    def spawn(self, stream: int) -> HoleRNG:
+        """ independent sub-stream number stream of the same seed """
+        return HoleRNG(self.seed, stream, self.block_size)
+
+    def __repr__(self) -> str:
+        return f"HoleRNG(seed={self.seed}, stream={self.stream})"
@@ -1,6 +1,78 @@
 from __future__ import annotations
 from .grid_cell import GridCell, GridASCIIArt
+from .grid_storage import make_storage
+from . import maze_binary
+from .actions import LEFT, RIGHT, UP, DOWN
+from .bitboard import BitBoard
+from .distance_field import DistanceField
+from .hierarchical import HierarchicalPathfinder
+from .path_cache import PathCache
+from .hole_rng import HoleRNG
+from .reachability import ReachabilityIndex
+from array import array
+from collections import deque, namedtuple
 import json
+import random
+
+# compressed sparse row adjacency of the passable cells:
+# the neighbours of cell i are targets[offsets[i]:offsets[i + 1]],
+# reached with actions[offsets[i]:offsets[i + 1]]
+Adjacency = namedtuple("Adjacency", ["offsets", "targets", "actions"])
+# how many edits edited_cells() can look back
+EDIT_LOG_SIZE = 256
+
+
+class MazeCell(GridCell):
+    """
+    one cell of a Maze as handed out by Maze.get_cell() and Maze.grid
+    reads come from the grid storage, writes go through make_wall,
+    make_floor and make_hole, so a shared grid is copied first and the
+    edit bumps the maze version like any other
+    """
+
+    def __init__(self, maze: Maze, index: int):
+        # GridCell.__init__ is skipped on purpose, it would reset the cell
+        self._maze = maze
+        self._index = index
+
+    @property
+    def is_wall(self) -> bool:
+        return self._maze.is_wall_index(self._index)
+
+    @is_wall.setter
+    def is_wall(self, is_wall: bool):
+        x, y = self._maze.unflatten(self._index)
+        if is_wall:
+            self._maze.make_wall(x, y)
+        elif self.is_wall:
+            self._maze.make_floor(x, y)
+
+    @property
+    def hole_chance(self) -> float:
+        return self._maze._storage.hole_chance(self._index)
+
+    @hole_chance.setter
+    def hole_chance(self, hole_chance: float):
+        x, y = self._maze.unflatten(self._index)
+        self._maze.make_hole(x, y, hole_chance)
+
+
+class MazeGrid:
+    """
+    the cells of a Maze in flat index order, as MazeCell objects
+    """
+
+    def __init__(self, maze: Maze):
+        self._maze = maze
+
+    def __len__(self) -> int:
+        return self._maze.size
+
+    def __getitem__(self, index: int) -> MazeCell:
+        size = self._maze.size
+        if index < -size or index >= size:
+            raise IndexError("cell index out of range")
+        return MazeCell(self._maze, index % size)
 
 
 class Maze:
@@ -9,19 +81,39 @@ class Maze:
     """
 
     @classmethod
-    def create_from_json(cls, file) -> Maze:
+    def create_from_json(cls, file, storage: str = "cells") -> Maze:
         """ create a map instance from a JSON file
         """
-        return cls.deserialize(json.load(file))
+        return cls.deserialize(json.load(file), storage=storage)
 
     @classmethod
-    def deserialize(cls, map_dict) -> Maze:
+    def create_from_binary(cls, file) -> Maze:
+        """ create a map instance from a binary maze file (opened as "rb")
+            the file is memory mapped into "array" storage without copying
+            edits stay in memory, use store_binary() to write them
+
+            :raises
+                ValueError if the file is not a (valid) binary maze
+        """
+        header, storage = maze_binary.load(file)
+        loaded_map = cls(name=header["name"],
+                         dim_x=header["dim_x"],
+                         dim_y=header["dim_y"],
+                         storage=storage)
+        # the loader has validated the addresses, the cells are not touched
+        loaded_map._start = header["start"]
+        loaded_map._goal = header["goal"]
+        return loaded_map
+
+    @classmethod
+    def deserialize(cls, map_dict, storage: str = "cells") -> Maze:
         """ create a map instance from a dict (as read from JSON)
         """
         gridlist = map_dict["cells"]
         loaded_map = cls(name=map_dict["name"],
                          dim_x=map_dict["dim_x"],
-                         dim_y=map_dict["dim_y"])
+                         dim_y=map_dict["dim_y"],
+                         storage=storage)
         loaded_map.start = map_dict["start"]
         loaded_map.goal = map_dict["goal"]
 
@@ -34,12 +126,19 @@ class Maze:
 
         return loaded_map
 
-    def __init__(self, *, name: str, dim_x: int, dim_y: int):
+    def __init__(self, *, name: str, dim_x: int, dim_y: int,
+                 storage="cells"):
         """ a new map should be created as a new instance using the
             factory (class) methods, rather than calling __init__()
             _dim_x and _dim_y in particular should not be changed at any other
             point otherwise bad things will happen
             the grid is stored at fixed size
+            storage picks the grid engine:
+                "cells" - one GridCell object per cell
+                "array" - compact wall (uint8) and hole (float32) planes,
+                          meant for big mazes
+            or takes a ready storage engine of the right size (as the
+            binary loader does)
         """
         if dim_x < 2 or dim_y < 2:
             raise ValueError("Grid dimensions must be at least 2 x 2")
@@ -50,7 +149,30 @@ class Maze:
         self._size = self.dim_x * self._dim_y
         self._start = 0
         self._goal = self.size - 1
-        self.grid = tuple(GridCell() for _ in range(self.dim_x * self.dim_y))
+        # bumped on every edit, lets caches built from the maze notice changes
+        self._version = 0
+        # (version, cell index) of the latest edits, see edited_cells()
+        self._edit_log = deque(maxlen=EDIT_LOG_SIZE)
+        self._adjacency = None
+        self._adjacency_version = -1
+        # bit packed walls, rebuilt on the first query after an edit
+        self._bitboard = None
+        # incremental connected components, built on the first query
+        self._reachability = None
+        # incremental distances to the goal, built on the first query
+        self._distance_field = None
+        # cluster graph for hierarchical pathfinding, built on the first query
+        self._hierarchy = None
+        # memoized path queries, see path_cache()
+        self._path_cache = None
+        if isinstance(storage, str):
+            storage = make_storage(storage, self._size)
+        elif len(storage) != self._size:
+            raise ValueError("Storage size does not match grid dimensions")
+        self._storage = storage
+        # set while the storage is shared with other Maze instances
+        # (see share()), the first edit then copies it
+        self._shared = False
 
     @property
     def dim_x(self) -> int:
@@ -70,6 +192,100 @@ class Maze:
         """
         return self._size
 
+    def share(self) -> Maze:
+        """ returns a new Maze on the same grid storage, without copying
+            the grid is copied on write: the first edit through the Maze
+            API (make_wall, make_floor, make_hole) of either instance gives
+            that instance its own copy, so edits never leak into the other
+            start and goal are plain values and never shared
+        """
+        shared_map = type(self)(name=self.name,
+                                dim_x=self.dim_x,
+                                dim_y=self.dim_y,
+                                storage=self._storage)
+        shared_map._start = self._start
+        shared_map._goal = self._goal
+        shared_map._version = self._version
+        # the caches are never changed in place, they can be shared too
+        shared_map._adjacency = self._adjacency
+        shared_map._adjacency_version = self._adjacency_version
+        shared_map._bitboard = self._bitboard
+        shared_map._shared = True
+        self._shared = True
+        return shared_map
+
+    def _own_storage(self):
+        """ copy-on-write part of share(), call before changing the grid
+        """
+        if self._shared:
+            self._storage = self._storage.copy()
+            self._shared = False
+
+    def _edited(self, index: int | None = None, was_wall: bool | None = None):
+        """ bookkeeping after every edit: a new version, and the incremental
+            indexes get to follow the change of cell index (None for edits
+            that leave the grid alone, like moving start or goal)
+        """
+        self._version += 1
+        self._edit_log.append((self._version, index))
+        if self._reachability is not None:
+            self._reachability.cell_changed(index, was_wall)
+        if self._distance_field is not None:
+            self._distance_field.cell_changed(index, was_wall)
+        if self._hierarchy is not None:
+            self._hierarchy.cell_changed(index, was_wall)
+
+    @property
+    def version(self) -> int:
+        """ edit counter, changes whenever walls, holes, start or goal do
+        """
+        return self._version
+
+    def edited_cells(self, since: int) -> list[int] | None:
+        """ flat addresses of the cells edited after version since
+            None if that can not be told (too far back, or start / goal
+            moved), then everything has to be treated as changed
+        """
+        if since == self._version:
+            return []
+        log = self._edit_log
+        if not log or log[0][0] > since + 1:
+            return None
+        cells = [index for version, index in log if version > since]
+        if None in cells:
+            return None
+        return cells
+
+    @property
+    def storage(self) -> str:
+        """ name of the grid storage engine ("cells" or "array")
+        """
+        return self._storage.kind
+
+    @property
+    def grid(self) -> MazeGrid:
+        """ the cells in flat index order, as GridCell (like) objects
+            that edit through make_wall / make_floor / make_hole
+            prefer the wall_plane() / hole_plane() views for bulk reads
+        """
+        return MazeGrid(self)
+
+    def wall_plane(self) -> memoryview:
+        """ bulk access to the walls: a read-only buffer of one byte per
+            cell in flat index order (1 = wall)
+            live for "array" storage, a snapshot for "cells" storage
+            wraps without copies as numpy.frombuffer(..., dtype=numpy.uint8)
+        """
+        return self._storage.wall_plane()
+
+    def hole_plane(self) -> memoryview:
+        """ bulk access to the hole chances: a read-only buffer of one
+            float32 per cell in flat index order
+            live for "array" storage, a snapshot for "cells" storage
+            wraps without copies as numpy.frombuffer(..., dtype=numpy.float32)
+        """
+        return self._storage.hole_plane()
+
     @property
     def start(self) -> tuple[int, int]:
         """ coordinates of the start grid
@@ -84,6 +300,7 @@ class Maze:
             raise ValueError("Collides with goal")
         self.make_floor(x, y)
         self._start = start
+        self._edited()
 
     @property
     def goal(self) -> tuple[int, int]:
@@ -99,15 +316,20 @@ class Maze:
             raise ValueError("Collides with start")
         self.make_floor(x, y)
         self._goal = goal
+        self._edited()
 
-    def roll_hole(self, x, y) -> bool:
+    def roll_hole(self, x, y, rng: HoleRNG | None = None) -> bool:
         """ rolls the hole chance for a given field
+            with an rng (helpers.hole_rng.HoleRNG) the rolls can be
+            repeated, without one the global random module rolls
         """
         if self.is_start(x, y) or self.is_goal(x, y) or self.is_wall(x, y):
             return False
 
-        if self.get_cell(x, y).is_hole:
-            return True
+        hole_chance = self._storage.hole_chance(self.flatten(x, y))
+        if rng is None:
+            return hole_chance > 0 and random.random() <= hole_chance
+        return rng.roll(hole_chance)
 
     def flatten(self, x: int, y: int):
         """ for a pair x, y returns a flat index to access (x, y)
@@ -133,7 +355,7 @@ class Maze:
         map_cells = []
         for y in range(self.dim_y):
             for x in range(self.dim_x):
-                cell = self.grid[self.flatten(x, y)].serialize()
+                cell = self._storage.cell(self.flatten(x, y)).serialize()
                 cell["x"] = x
                 cell["y"] = y
                 map_cells.append(cell)
@@ -146,15 +368,62 @@ class Maze:
             "cells": map_cells
         }
 
+    def adjacency(self) -> Adjacency:
+        """ neighbour index of the passable cells in compressed sparse row
+            form (see Adjacency), built on first use and cached until the
+            next edit. walls have no neighbours, neighbours come in
+            NEIGHBOUR_ORDER
+            the arrays are shared, do not change them
+        """
+        if self._adjacency_version != self._version:
+            self._adjacency = self._build_adjacency()
+            self._adjacency_version = self._version
+        return self._adjacency
+
+    def _build_adjacency(self) -> Adjacency:
+        walls = self.wall_plane()
+        dim_x, size = self.dim_x, self.size
+        offsets = array("l", [0]) * (size + 1)
+        targets = array("l")
+        actions = bytearray()
+        add_target = targets.append
+        add_action = actions.append
+        # unrolled in NEIGHBOUR_ORDER: down, up, right, left
+        for index in range(size):
+            if not walls[index]:
+                x = index % dim_x
+                if index + dim_x < size and not walls[index + dim_x]:
+                    add_target(index + dim_x)
+                    add_action(DOWN)
+                if index >= dim_x and not walls[index - dim_x]:
+                    add_target(index - dim_x)
+                    add_action(UP)
+                if x < dim_x - 1 and not walls[index + 1]:
+                    add_target(index + 1)
+                    add_action(RIGHT)
+                if x > 0 and not walls[index - 1]:
+                    add_target(index - 1)
+                    add_action(LEFT)
+            offsets[index + 1] = len(targets)
+        return Adjacency(offsets, targets, actions)
+
     def store_json(self, file):
         """ write the calling instance into a JSON file
         """
         json.dump(self.serialize(), file, indent=4)
 
+    def store_binary(self, file):
+        """ write the calling instance into a binary maze file (opened as
+            "wb"), see helpers.maze_binary for the layout
+            hole chances are stored as float32
+        """
+        maze_binary.dump(self, file)
+
     def get_cell(self, x: int, y: int) -> GridCell:
         """ for a passed cell (x,y) returns the cell object
+            (a MazeCell, writes to it are edits of the maze)
         """
-        return self.grid[self.flatten(x, y)]
+        return MazeCell(self, self.flatten(x, y))
 
     def is_start(self, x: int, y: int) -> bool:
         """ for a passed cell (x,y) returns True if it's the start cell
@@ -173,7 +442,84 @@ class Maze:
         if x < 0 or x >= self.dim_x or y < 0 or y >= self.dim_y:
             return True
 
-        return self.grid[self.flatten(x, y)].is_wall
+        return self._storage.is_wall(x + y * self._dim_x)
+
+    def is_wall_index(self, index: int) -> bool:
+        """ is_wall() for a flat cell address inside the grid
+        """
+        return self._storage.is_wall(index)
+
+    def _reachability_index(self) -> ReachabilityIndex:
+        if self._reachability is None:
+            self._reachability = ReachabilityIndex(self)
+        return self._reachability
+
+    def bitboard(self) -> BitBoard:
+        """ the passable cells as bit masks (see helpers.bitboard), built
+            on first use and cached until the next edit
+        """
+        if self._bitboard is None or self._bitboard.version != self._version:
+            self._bitboard = BitBoard(self)
+        return self._bitboard
+
+    def reachable(self, a: tuple[int, int], b: tuple[int, int],
+                  backend: str = "labels") -> bool:
+        """ True if there is a path between the cells a and b (x, y)
+            backend "labels" answers from the component labels, which are
+            built on the first call and then follow every edit
+            incrementally. "bitboard" flood fills the bit packed walls,
+            much faster for a one off check on a big maze
+        """
+        if backend == "bitboard":
+            return self.bitboard().reachable(self.flatten(*a),
+                                             self.flatten(*b))
+        if backend != "labels":
+            raise ValueError(f"Unknown reachability backend: {backend}")
+        index = self._reachability_index()
+        label = index.label(self.flatten(*a))
+        return label != -1 and label == index.label(self.flatten(*b))
+
+    def is_solvable(self, backend: str = "labels") -> bool:
+        """ True if the goal can be reached from the start
+            (for backend see reachable())
+        """
+        return self.reachable(self.start, self.goal, backend)
+
+    def distance_field(self) -> DistanceField:
+        """ the breadth first distances of all cells to the goal
+            built on the first call, then repaired locally on every edit
+        """
+        if self._distance_field is None:
+            self._distance_field = DistanceField(self)
+        return self._distance_field
+
+    def distance_to_goal(self, x: int, y: int) -> int:
+        """ number of steps from (x, y) to the goal, -1 if there is no way
+        """
+        return self.distance_field().distance(self.flatten(x, y))
+
+    def path_to_goal(self, x: int, y: int) -> list | None:
+        """ a shortest path from (x, y) to the goal as action strings
+            (see MazeAgentAccess.trace_path()), None if there is no way
+        """
+        return self.distance_field().path_from(self.flatten(x, y))
+
+    def hierarchy(self) -> HierarchicalPathfinder:
+        """ the cluster graph for hierarchical pathfinding (see
+            helpers.hierarchical), clusters are built on the first query
+            and only the ones touched by an edit are rebuilt
+        """
+        if self._hierarchy is None:
+            self._hierarchy = HierarchicalPathfinder(self)
+        return self._hierarchy
+
+    def path_cache(self) -> PathCache:
+        """ memoized pathfinding on this maze (see helpers.path_cache),
+            entries from before an edit are never served
+        """
+        if self._path_cache is None:
+            self._path_cache = PathCache(self)
+        return self._path_cache
 
     def can_enter(self, x: int, y: int) -> bool:
         """ check if given cell can be stepped into
@@ -188,14 +534,22 @@ class Maze:
         if self.is_goal(x, y) or self.is_start(x, y):
             raise ValueError("Collides with start or goal")
 
-        self.grid[self.flatten(x, y)].is_wall = True
+        index = self.flatten(x, y)
+        was_wall = self._storage.is_wall(index)
+        self._own_storage()
+        self._storage.set_wall(index, True)
+        self._edited(index, was_wall)
 
     def make_floor(self, x: int, y: int):
         """ marks the given cell (x, y) as clear floor
             overrides any other floor conditions
         """
-        self.grid[self.flatten(x, y)].is_wall = False
-        self.grid[self.flatten(x, y)].hole_chance = 0
+        index = self.flatten(x, y)
+        was_wall = self._storage.is_wall(index)
+        self._own_storage()
+        self._storage.set_wall(index, False)
+        self._storage.set_hole_chance(index, 0)
+        self._edited(index, was_wall)
 
     def make_hole(self, x: int, y: int, hole_chance: float = 1):
         """ marks the given cell (x, y) as a hole (or assings a chance)
@@ -204,7 +558,11 @@ class Maze:
         """
         if hole_chance > 0 and (self.is_goal(x, y) or self.is_start(x, y)):
             raise ValueError("Collides with start or goal")
-        self.grid[self.flatten(x, y)].hole_chance = hole_chance
+        index = self.flatten(x, y)
+        was_wall = self._storage.is_wall(index)
+        self._own_storage()
+        self._storage.set_hole_chance(index, hole_chance)
+        self._edited(index, was_wall)
 
     def __repr__(self) -> str:
         """ object representation
@@ -212,6 +570,16 @@ class Maze:
         return (f"MapGrid(dim_x={self.dim_x}, dim_y={self.dim_y}, "
                 f"start={self.start}, goal={self.goal})")
 
+    def cell_ascii_art(self, x: int, y: int) -> str:
+        """ returns the 'ASCII-Art' pixel of one cell (x, y)
+            start and goal take precedence over the cell contents
+        """
+        if self.is_goal(x, y):
+            return GridASCIIArt.GOAL
+        if self.is_start(x, y):
+            return GridASCIIArt.START
+        return self.get_cell(x, y).ascii_art()
+
     def ascii_art_buffer(self) -> list[list[str]]:
         """ returns a simple 'ASCII-Art' view of the grid
         """
@@ -228,12 +596,7 @@ class Maze:
             # frame vertical left
             # iteration through the cells in a given line
             for x in range(self.dim_x):
-                pixel = self.get_cell(x, y).ascii_art()
-                if self.is_start(x, y):
-                    pixel = GridASCIIArt.START
-                if self.is_goal(x, y):
-                    pixel = GridASCIIArt.GOAL
-                buffer_line.append(pixel)
+                buffer_line.append(self.cell_ascii_art(x, y))
             # frame vertical right
             # axis label Y
             buffer_line.append(GridASCIIArt.WALL)
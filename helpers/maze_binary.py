@@ -0,0 +1,132 @@
+""" compact binary container for mazes
+
+    layout (little endian):
+        header  "<4sHHIIIII"
+                magic b"MAZE", format version, reserved,
+                dim_x, dim_y, start, goal (flat cell addresses),
+                length of the name in bytes
+        name    utf-8, padded with zeros to a multiple of 8
+        walls   dim_x * dim_y bytes, 1 = wall
+                padded with zeros to a multiple of 4
+        holes   dim_x * dim_y float32 hole chances
+
+    both planes are stored exactly as ArrayStorage keeps them in memory,
+    so loading maps the file and hands the planes over without copying
+"""
+from array import array
+from .grid_storage import ArrayStorage
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"MAZE"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHIIIII")
+FILE_NAME = "map.mzb"
+
+
+def _padding(length: int, alignment: int) -> int:
+    return -length % alignment
+
+
+def dump(maze, file):
+    """ writes the maze into a binary file (opened as "wb")
+    """
+    name = maze.name.encode("utf-8")
+    file.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0,
+                           maze.dim_x, maze.dim_y,
+                           maze.flatten(*maze.start),
+                           maze.flatten(*maze.goal),
+                           len(name)))
+    file.write(name + bytes(_padding(len(name), 8)))
+
+    file.write(maze.wall_plane())
+    file.write(bytes(_padding(maze.size, 4)))
+
+    holes = maze.hole_plane()
+    if sys.byteorder == "big":
+        holes = array("f", holes)
+        holes.byteswap()
+    file.write(holes)
+
+
+def save(maze, path):
+    """ writes the maze to path through a temporary file and os.replace()
+        so readers never see a half written file
+        a maze loaded from a binary file is moved off its memory map first.
+        on POSIX other mappings of path keep the old contents, windows
+        does not replace a file that is still mapped (by another maze or
+        process)
+
+        :raises
+            PermissionError if path can not be replaced, the temporary
+            file is removed again
+    """
+    storage = getattr(maze, "_storage", None)
+    if isinstance(storage, ArrayStorage):
+        storage.detach()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        dump(maze, file)
+    try:
+        os.replace(tmp_path, path)
+    except PermissionError:
+        os.remove(tmp_path)
+        raise
+
+
+def load(file) -> tuple[dict, ArrayStorage]:
+    """ maps a binary maze file (opened as "rb") into memory
+        returns the header as a dict (name, dim_x, dim_y, start, goal,
+        the latter as flat cell addresses) and an ArrayStorage
+        working directly on the mapped planes
+        the mapping is copy-on-write: edits to the maze stay in memory
+        and never reach the file
+
+        :raises
+            ValueError if the file is not a (valid) binary maze
+    """
+    try:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    except ValueError:
+        # mmap refuses empty files
+        raise ValueError("Not a binary maze file") from None
+
+    if len(buffer) < HEADER.size:
+        raise ValueError("Not a binary maze file")
+    (magic, version, _, dim_x, dim_y,
+     start, goal, name_length) = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a binary maze file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary maze version: {version}")
+
+    size = dim_x * dim_y
+    name_offset = HEADER.size
+    walls_offset = name_offset + name_length + _padding(name_length, 8)
+    holes_offset = walls_offset + size + _padding(size, 4)
+    if len(buffer) != holes_offset + 4 * size:
+        raise ValueError("Binary maze file is truncated or corrupt")
+    if start >= size or goal >= size or start == goal:
+        raise ValueError("Binary maze has invalid start or goal")
+
+    view = memoryview(buffer)
+    walls = view[walls_offset:holes_offset - _padding(size, 4)]
+    holes = view[holes_offset:holes_offset + 4 * size]
+    if sys.byteorder == "big":
+        # the file is little endian, big endian hosts get a swapped copy
+        holes = array("f", holes.tobytes())
+        holes.byteswap()
+    else:
+        holes = holes.cast("f")
+
+    header = {
+        "name": bytes(view[name_offset:name_offset + name_length])
+        .decode("utf-8"),
+        "dim_x": dim_x,
+        "dim_y": dim_y,
+        "start": start,
+        "goal": goal,
+    }
+    return header, ArrayStorage(size, walls=walls, holes=holes, keep=buffer)
@@ -0,0 +1,93 @@
+""" process wide cache of parsed maze files
+
+    every MazeAgentAccess used to open and parse its map file on its own.
+    the registry parses each file once and hands out copy-on-write shares
+    (Maze.share()) of the cached maze, so many agents on the same maze
+    share one grid until one of them edits it
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from . import maze_binary
+from .maze import Maze
+
+
+class MazeRegistry:
+    """
+    LRU cache: resolved file path -> parsed Maze
+    an entry is only used while the files mtime and size still match
+    """
+
+    def __init__(self, max_entries: int = 16):
+        if max_entries < 1:
+            raise ValueError("Registry needs room for at least one maze")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, path) -> Maze:
+        """ returns a copy-on-write share of the maze stored at path
+            binary files (maze_binary.FILE_NAME) are memory mapped,
+            anything else is read as JSON
+
+            :raises
+                FileNotFoundError if there is no such file
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1].share()
+
+        # parse outside the lock, big files should not block other lookups
+        maze = self._parse(path)
+
+        with self._lock:
+            self.misses += 1
+            # a changed file replaces its old entry, that is no eviction
+            self._entries[path] = (signature, maze)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return maze.share()
+
+    @staticmethod
+    def _parse(path: Path) -> Maze:
+        if path.name == maze_binary.FILE_NAME:
+            with open(path, "rb") as file:
+                return Maze.create_from_binary(file)
+        with open(path) as file:
+            return Maze.create_from_json(file)
+
+    def stats(self) -> dict:
+        """ counters and fill level of the cache """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    def clear(self):
+        """ drops all entries, the counters are kept """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# the registry MazeAgentAccess loads its mazes from
+registry = MazeRegistry()
@@ -1,46 +1,154 @@
+from .grid_cell import GridASCIIArt
+
+# what a viewport shows beyond the frame around the maze
+OFF_MAP = "   "
+
+
 class MazeView:
 
     def __init__(self, name, maze,
                  offset_x=1, offset_y=1):
         self.name = name
         self.maze = maze
-        # foreground buffer is a list of dicts
-        # {"x": int, "y": int, "icon": str}
-        self.fg_buffer = []
+        # foreground: (x, y, icon) tuples, only changed through
+        # add_fg_pixel() and clear_fg(), see fg_buffer
+        self._fg = []
+        # bumped by clear_fg(), the frame cache compares it
+        self._fg_clears = 0
         self.offset_x = offset_x
         self.offset_y = offset_y
 
+        # render cache
+        # background: the mazes ascii art, the cells edited since the
+        # last frame are patched in. frame: background + foreground, kept
+        # between frames and patched. lines: the joined lines of the frame
+        self._background = None
+        self._background_version = -1
+        self._frame = None
+        self._lines = None
+        # frame cells currently covered by the foreground
+        self._overlaid = set()
+        # which foreground (by clear_fg count) has been drawn, how much
+        self._fg_drawn_clears = -1
+        self._fg_drawn_count = 0
+
+    @property
+    def fg_buffer(self) -> list[dict]:
+        """ copy of the foreground as a list of dicts
+            {"x": int, "y": int, "icon": str}, changing it has no effect
+            use add_fg_pixel() and clear_fg()
+        """
+        return [{"x": x, "y": y, "icon": icon} for x, y, icon in self._fg]
+
     def draw_ascii_art(self) -> str:
         """ creates a terminal friendly ascii-art string
             from the current buffer
         """
-        artsy_string = f"{self.name}"
-
-        for line in self.frame_buffer():
-            artsy_string += "\n" + "".join(line)
-
-        return artsy_string
+        self._update_frame()
+        return f"{self.name}\n" + "\n".join(self._lines)
 
     def frame_buffer(self) -> list:
         """ combines bg and foreground into a frame
+            the frame is cached and patched between calls, treat it as
+            read-only
+        """
+        self._update_frame()
+        return self._frame
+
+    def _update_frame(self):
+        """ brings the cached frame up to date
+            only the cells edited in the maze and the ones the foreground
+            touched since the last frame are redrawn
         """
-        frame = self.maze.ascii_art_buffer()
-        for entry in self.fg_buffer:
-            try:
-                x = entry["x"] + self.offset_x
-                y = entry["y"] + self.offset_y
-                icon = entry["icon"]
-                icon = icon[:3]
-            except ValueError:
-                # we just don't print bad entries
-                pass
+        maze = self.maze
+        dirty_lines = set()
+        if self._background_version != maze.version:
+            edited = maze.edited_cells(self._background_version)
+            if edited is None:
+                self._background = maze.ascii_art_buffer()
+                self._frame = [list(line) for line in self._background]
+                self._lines = ["".join(line) for line in self._frame]
+                self._overlaid = set()
+                self._fg_drawn_clears = -1
             else:
-                # note: coordinates inverted
-                # because the frame buffer is a list of lines
-                # we pick the line [y] first, and column [x] second
-                frame[y][x] = icon
+                for index in edited:
+                    cell_x, cell_y = maze.unflatten(index)
+                    # the ascii art has a frame around the maze
+                    x, y = cell_x + 1, cell_y + 1
+                    self._background[y][x] = maze.cell_ascii_art(cell_x,
+                                                                 cell_y)
+                    if (x, y) not in self._overlaid:
+                        self._frame[y][x] = self._background[y][x]
+                        dirty_lines.add(y)
+            self._background_version = maze.version
+
+        # a cleared foreground starts from the background
+        if self._fg_drawn_clears != self._fg_clears:
+            for x, y in self._overlaid:
+                self._frame[y][x] = self._background[y][x]
+                dirty_lines.add(y)
+            self._overlaid = set()
+            self._fg_drawn_clears = self._fg_clears
+            self._fg_drawn_count = 0
+
+        for x, y, icon in self._fg[self._fg_drawn_count:]:
+            x += self.offset_x
+            y += self.offset_y
+            # note: coordinates inverted
+            # because the frame buffer is a list of lines
+            # we pick the line [y] first, and column [x] second
+            self._frame[y][x] = icon
+            self._overlaid.add((x, y))
+            dirty_lines.add(y)
+        self._fg_drawn_count = len(self._fg)
+
+        for y in dirty_lines:
+            self._lines[y] = "".join(self._frame[y])
+
+    def viewport_origin(self, center_x: int, center_y: int,
+                        cols: int, rows: int) -> tuple[int, int]:
+        """ top left maze cell of a cols x rows window centred on
+            (center_x, center_y), e.g. the agent
+            the window is pushed back inside the framed maze (border
+            included) so it does not show more off-map area than needed
+            mazes smaller than the window are shown whole from the border
+        """
+        left = center_x - cols // 2
+        top = center_y - rows // 2
+        # the frame spans the cells -1 .. dim (border on both sides)
+        left = max(-1, min(left, self.maze.dim_x + 1 - cols))
+        top = max(-1, min(top, self.maze.dim_y + 1 - rows))
+        return left, top
+
+    def viewport_buffer(self, left: int, top: int,
+                        cols: int, rows: int) -> list[list[str]]:
+        """ renders only the window of cols x rows cells with the maze
+            cell (left, top) in the top left corner, for mazes too big to
+            draw whole. the border sits at -1 and dim_x / dim_y, beyond
+            that the window is blank. axis labels are left out
+            costs grow with the window and the fg buffer, not the maze
+        """
+        maze = self.maze
+        dim_x, dim_y = maze.dim_x, maze.dim_y
+        window = []
+        for y in range(top, top + rows):
+            line = []
+            for x in range(left, left + cols):
+                if x < -1 or x > dim_x or y < -1 or y > dim_y:
+                    line.append(OFF_MAP)
+                elif x == -1 or x == dim_x or y == -1 or y == dim_y:
+                    line.append(GridASCIIArt.WALL)
+                else:
+                    line.append(maze.cell_ascii_art(x, y))
+            window.append(line)
+
+        for x, y, icon in self._fg:
+            x -= left
+            y -= top
+            if 0 <= x < cols and 0 <= y < rows:
+                window[y][x] = icon
 
-        return frame
+        return window
 
     def add_fg_widget(self, widget: list[dict]):
         """ adds a list of pixels to the foreground buffer """
@@ -49,11 +157,13 @@ class MazeView:
 
     def add_fg_pixel(self, fg_pixel: dict):
         """ adds a pixel to the foreground buffer """
-        if not isinstance(fg_pixel, dict):
+        if (not isinstance(fg_pixel, dict)
+                or not {"x", "y", "icon"} <= fg_pixel.keys()):
             raise ValueError("Bad pixel. Expected: "
                              "{\"x\": int, \"y\": int, \"icon\": str}")
-        self.fg_buffer.append(fg_pixel)
+        self._fg.append((fg_pixel["x"], fg_pixel["y"], fg_pixel["icon"][:3]))
 
     def clear_fg(self):
         """ clears the fg buffer """
-        self.fg_buffer = []
+        self._fg = []
+        self._fg_clears += 1
@@ -0,0 +1,85 @@
+""" memoized path queries on one maze
+
+    tools tend to ask for the same (start, goal) paths over and over. the
+    cache keeps the answers of helpers.pathfinding per (start, goal,
+    algorithm) in a bounded LRU. every edit of the maze bumps
+    Maze.version, the first lookup after that drops all entries, so a
+    path from before an edit is never handed out
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from . import pathfinding
+
+
+class PathCache:
+    """
+    LRU cache: (start, goal, algorithm) -> (path, expanded) of one Maze
+    """
+
+    def __init__(self, maze, max_entries: int = 256):
+        if max_entries < 1:
+            raise ValueError("Path cache needs room for at least one path")
+        self.maze = maze
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.version = maze.version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # entries dropped because the maze was edited
+        self.invalidations = 0
+
+    def find_path(self, start=None, goal=None,
+                  algorithm: str = "bfs") -> tuple[list | None, int]:
+        """ pathfinding.find_path(), answered from the cache if possible
+            start and goal default to the mazes own
+            the path is a copy, callers may change it
+        """
+        if algorithm not in pathfinding.ALGORITHMS:
+            raise ValueError(f"Unknown pathfinding algorithm: {algorithm}")
+        maze = self.maze
+        if self.version != maze.version:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self.version = maze.version
+        key = (tuple(start or maze.start), tuple(goal or maze.goal),
+               algorithm)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = pathfinding.find_path(maze, algorithm, *key[:2])
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        path, expanded = entry
+        return (None if path is None else list(path)), expanded
+
+    @property
+    def hit_ratio(self) -> float:
+        """ share of lookups answered from the cache, 0 before the first """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """ counters and fill level of the cache """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+    def clear(self):
+        """ drops all entries, the counters are kept """
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,364 @@
+""" pathfinders working on a Maze
+
+    all searches run on flat cell indices over the mazes cached adjacency
+    (Maze.adjacency()) and keep one parent entry per cell instead of a
+    copy of the path per node.
+    the path is rebuilt once, at the end.
+    every search returns (path, expanded):
+        path     - list of action strings ("left", "right", "up", "down")
+                   as MazeAgentAccess.trace_path() takes them,
+                   None if the goal can not be reached
+        expanded - number of nodes taken off the horizon and expanded
+"""
+from __future__ import annotations
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+from typing import TYPE_CHECKING
+from .actions import ACTION_NAMES, LEFT, RIGHT, UP, DOWN
+if TYPE_CHECKING:
+    # for the annotations only, helpers.maze imports this module (through
+    # helpers.path_cache)
+    from .maze import Maze
+
+
+def _endpoints(maze: Maze, start, goal) -> tuple[int, int]:
+    """ flat indices of start and goal, defaulting to the mazes own """
+    if start is None:
+        start = maze.start
+    if goal is None:
+        goal = maze.goal
+    return maze.flatten(*start), maze.flatten(*goal)
+
+
+def _rebuild_path(parents, parent_actions, start: int, goal: int) -> list:
+    """ walks the parent entries back from goal to start """
+    path = []
+    node = goal
+    while node != start:
+        path.append(ACTION_NAMES[parent_actions[node]])
+        node = parents[node]
+    path.reverse()
+    return path
+
+
+def _parent_arrays(size: int) -> tuple[array, bytearray]:
+    return array("l", [-1]) * size, bytearray(size)
+
+
+def bfs(maze: Maze, start=None, goal=None) -> tuple[list | None, int]:
+    """ breadth first search, finds a shortest path (in steps)
+    """
+    start, goal = _endpoints(maze, start, goal)
+    offsets, targets, actions = maze.adjacency()
+    size = maze.size
+    parents, parent_actions = _parent_arrays(size)
+    parents[start] = start
+    expanded = 0
+
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        expanded += 1
+        if node == goal:
+            return _rebuild_path(parents, parent_actions, start, goal), \
+                expanded
+        for i in range(offsets[node], offsets[node + 1]):
+            target = targets[i]
+            if parents[target] == -1:
+                parents[target] = node
+                parent_actions[target] = actions[i]
+                queue.append(target)
+
+    return None, expanded
+
+
+def dfs(maze: Maze, start=None, goal=None) -> tuple[list | None, int]:
+    """ depth first search with an explicit stack (no recursion limit)
+        finds a path, not necessarily a short one
+    """
+    start, goal = _endpoints(maze, start, goal)
+    offsets, targets, actions = maze.adjacency()
+    size = maze.size
+    parents, parent_actions = _parent_arrays(size)
+    expanded = 0
+
+    # the parent is only settled once a node is taken off the stack,
+    # that is what makes it depth first
+    stack = [(start, start, 0)]
+    while stack:
+        node, parent, action = stack.pop()
+        if parents[node] != -1:
+            continue
+        parents[node] = parent
+        parent_actions[node] = action
+        expanded += 1
+        if node == goal:
+            return _rebuild_path(parents, parent_actions, start, goal), \
+                expanded
+        for i in range(offsets[node], offsets[node + 1]):
+            if parents[targets[i]] == -1:
+                stack.append((targets[i], node, actions[i]))
+
+    return None, expanded
+
+
+def _cell_costs(maze: Maze, hole_cost: float):
+    """ cost of entering each cell: 1 per step, plus hole_cost weighted
+        by the cells hole chance (0 keeps every step at cost 1)
+    """
+    if not hole_cost:
+        return None
+    return [1 + hole_cost * chance for chance in maze.hole_plane()]
+
+
+def _best_first(maze: Maze, start, goal, hole_cost: float,
+                heuristic: bool) -> tuple[list | None, int]:
+    """ shared part of dijkstra() and astar() """
+    start, goal = _endpoints(maze, start, goal)
+    offsets, targets, actions = maze.adjacency()
+    dim_x, size = maze.dim_x, maze.size
+    costs = _cell_costs(maze, hole_cost)
+    parents, parent_actions = _parent_arrays(size)
+    distances = array("d", [float("inf")]) * size
+    closed = bytearray(size)
+    goal_x, goal_y = goal % dim_x, goal // dim_x
+    expanded = 0
+
+    def estimate(index: int) -> int:
+        # manhattan distance, never more than the real (>= 1 per step) cost
+        if not heuristic:
+            return 0
+        return abs(index % dim_x - goal_x) + abs(index // dim_x - goal_y)
+
+    parents[start] = start
+    distances[start] = 0
+    horizon = [(estimate(start), start)]
+    while horizon:
+        _, node = heappop(horizon)
+        if closed[node]:
+            continue
+        closed[node] = 1
+        expanded += 1
+        if node == goal:
+            return _rebuild_path(parents, parent_actions, start, goal), \
+                expanded
+        for i in range(offsets[node], offsets[node + 1]):
+            target = targets[i]
+            step = 1 if costs is None else costs[target]
+            distance = distances[node] + step
+            if distance < distances[target]:
+                distances[target] = distance
+                parents[target] = node
+                parent_actions[target] = actions[i]
+                heappush(horizon, (distance + estimate(target), target))
+
+    return None, expanded
+
+
+def dijkstra(maze: Maze, start=None, goal=None,
+             hole_cost: float = 0) -> tuple[list | None, int]:
+    """ cheapest path, every step costs 1 plus hole_cost * hole chance of
+        the cell entered (so positive hole_cost steers around holes)
+    """
+    return _best_first(maze, start, goal, hole_cost, heuristic=False)
+
+
+def astar(maze: Maze, start=None, goal=None,
+          hole_cost: float = 0) -> tuple[list | None, int]:
+    """ A* with the manhattan distance as heuristic
+        same costs and results as dijkstra(), usually far fewer expansions
+    """
+    return _best_first(maze, start, goal, hole_cost, heuristic=True)
+
+
+def _jumps(maze: Maze, goal: int):
+    """ the straight line jumps of jps(), over a bytes copy of the walls
+        a horizontal scan is a few bytes.find() calls: the next wall on
+        the row, the goal, or a forced turn (a wall behind a free cell
+        above or below) ends it
+    """
+    walls = maze.wall_plane().tobytes()
+    dim_x, dim_y = maze.dim_x, maze.dim_y
+
+    def horizontal(index: int, dx: int) -> int | None:
+        """ first jump point right (dx = 1) or left (dx = -1) of index """
+        row = index - index % dim_x
+        found = []
+        if dx == 1:
+            first = index + 1
+            stop = walls.find(1, first, row + dim_x)
+            if stop == -1:
+                stop = row + dim_x
+            if first <= goal < stop:
+                found.append(goal)
+            # free cell above / below, wall before it: b"\x01\x00"
+            for offset in (-dim_x, dim_x):
+                if 0 <= row + offset < dim_x * dim_y:
+                    turn = walls.find(b"\x01\x00", index + offset,
+                                      stop + offset)
+                    if turn != -1:
+                        found.append(turn + 1 - offset)
+            return min(found, default=None)
+
+        first = index - 1
+        stop = walls.rfind(1, row, first + 1)
+        if stop == -1:
+            stop = row - 1
+        if stop < goal <= first:
+            found.append(goal)
+        for offset in (-dim_x, dim_x):
+            if 0 <= row + offset < dim_x * dim_y:
+                turn = walls.rfind(b"\x00\x01", stop + 1 + offset,
+                                   index + 1 + offset)
+                if turn != -1:
+                    found.append(turn - offset)
+        return max(found, default=None)
+
+    def vertical(index: int, dy: int) -> int | None:
+        """ first jump point down (dy = 1) or up (dy = -1) of index: the
+            goal, or a cell with a jump point to its left or right
+        """
+        step = dy * dim_x
+        index += step
+        while 0 <= index < dim_x * dim_y and not walls[index]:
+            if (index == goal or horizontal(index, 1) is not None
+                    or horizontal(index, -1) is not None):
+                return index
+            index += step
+        return None
+
+    def blocked(index: int) -> bool:
+        return not 0 <= index < dim_x * dim_y or walls[index]
+
+    return horizontal, vertical, blocked
+
+
+def jps(maze: Maze, start=None, goal=None) -> tuple[list | None, int]:
+    """ jump point search for 4-connected grids: A* that only stops at
+        cells where a shortest path may have to turn (jump points)
+        paths go vertical first, a vertical jump stops level with a jump
+        point sideways, a horizontal jump stops where a wall behind a free
+        cell above or below forces a turn. same path lengths as bfs() and
+        astar(), on open mazes a tiny fraction of the expansions
+        holes are ignored, every step costs 1
+    """
+    start, goal = _endpoints(maze, start, goal)
+    horizontal, vertical, blocked = _jumps(maze, goal)
+    dim_x = maze.dim_x
+    goal_x, goal_y = goal % dim_x, goal // dim_x
+    if start == goal:
+        return [], 1
+    if blocked(start):
+        return None, 1
+
+    parents = {start: start}
+    costs = {start: 0}
+    closed = set()
+    # on open floor every cell between start and goal has the same
+    # estimate, ties go to the one closer to the goal
+    horizon = [(0, 0, start)]
+    expanded = 0
+    while horizon:
+        _, _, node = heappop(horizon)
+        if node in closed:
+            continue
+        closed.add(node)
+        expanded += 1
+        if node == goal:
+            return _rebuild_jumps(parents, start, goal, dim_x), expanded
+
+        parent = parents[node]
+        x = node % dim_x
+        if node == start:
+            jumps = [horizontal(node, 1), horizontal(node, -1),
+                     vertical(node, 1), vertical(node, -1)]
+        elif x == parent % dim_x:
+            # came vertical: keep going or turn to either side
+            dy = 1 if node > parent else -1
+            jumps = [vertical(node, dy), horizontal(node, 1),
+                     horizontal(node, -1)]
+        else:
+            # came horizontal: keep going, turn only where forced
+            dx = 1 if node > parent else -1
+            jumps = [horizontal(node, dx)]
+            for step in (-dim_x, dim_x):
+                if blocked(node - dx + step) and not blocked(node + step):
+                    jumps.append(vertical(node, 1 if step > 0 else -1))
+
+        for target in jumps:
+            if target is None:
+                continue
+            distance = abs(target - node)
+            if distance >= dim_x:
+                distance //= dim_x
+            cost = costs[node] + distance
+            if cost < costs.get(target, cost + 1):
+                costs[target] = cost
+                parents[target] = node
+                estimate = (abs(target % dim_x - goal_x)
+                            + abs(target // dim_x - goal_y))
+                heappush(horizon, (cost + estimate, estimate, target))
+
+    return None, expanded
+
+
+def _rebuild_jumps(parents: dict, start: int, goal: int,
+                   dim_x: int) -> list:
+    """ _rebuild_path() for jps(), unrolls the straight jumps """
+    path = []
+    node = goal
+    while node != start:
+        parent = parents[node]
+        if node // dim_x == parent // dim_x:
+            action = RIGHT if node > parent else LEFT
+            steps = abs(node - parent)
+        else:
+            action = DOWN if node > parent else UP
+            steps = abs(node - parent) // dim_x
+        path += [ACTION_NAMES[action]] * steps
+        node = parent
+    path.reverse()
+    return path
+
+
+def bitboard_bfs(maze: Maze, start=None,
+                 goal=None) -> tuple[list | None, int]:
+    """ breadth first search over the bit packed walls (Maze.bitboard()),
+        a whole frontier layer per step. paths as short as bfs()
+    """
+    start, goal = _endpoints(maze, start, goal)
+    return maze.bitboard().shortest_path(start, goal)
+
+
+def hierarchical(maze: Maze, start=None,
+                 goal=None) -> tuple[list | None, int]:
+    """ A* over the mazes cluster graph (Maze.hierarchy()), refined into
+        single steps. paths close to, not always, the shortest
+        expanded counts abstract nodes
+    """
+    start, goal = _endpoints(maze, start, goal)
+    return maze.hierarchy().find_path(start, goal)
+
+
+ALGORITHMS = {
+    "bfs": bfs,
+    "bitboard": bitboard_bfs,
+    "dfs": dfs,
+    "dijkstra": dijkstra,
+    "astar": astar,
+    "jps": jps,
+    "hierarchical": hierarchical,
+}
+
+
+def find_path(maze: Maze, algorithm: str = "bfs",
+              start=None, goal=None) -> tuple[list | None, int]:
+    """ runs one of the ALGORITHMS by name
+    """
+    try:
+        search = ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(f"Unknown pathfinding algorithm: {algorithm}") \
+            from None
+    return search(maze, start, goal)
@@ -0,0 +1,202 @@
+""" connected components of the passable cells of a maze
+
+    every passable cell carries the label of its component, so asking if
+    two cells are connected is one comparison. the labels are kept up to
+    date on each wall change instead of being recomputed:
+        a cell opening up joins its neighbours components, smaller
+        components are relabelled into the biggest one
+        a cell turning into a wall may split its component. the neighbours
+        it separates are flooded in turns until they meet again, a piece
+        that runs out of cells first gets a new label
+    both only touch the affected cells, not the whole grid
+"""
+from __future__ import annotations
+from array import array
+from collections import deque
+
+
+class ReachabilityIndex:
+    """
+    component labels per cell (-1 for walls) of one Maze
+    """
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.rebuild()
+
+    def _neighbours(self, index: int) -> list[int]:
+        """ passable cells next to index """
+        maze = self.maze
+        dim_x, size = maze.dim_x, maze.size
+        x = index % dim_x
+        neighbours = []
+        if index + dim_x < size:
+            neighbours.append(index + dim_x)
+        if index >= dim_x:
+            neighbours.append(index - dim_x)
+        if x < dim_x - 1:
+            neighbours.append(index + 1)
+        if x > 0:
+            neighbours.append(index - 1)
+        return [n for n in neighbours if not maze.is_wall_index(n)]
+
+    def _new_label(self) -> int:
+        label = self._next_label
+        self._next_label += 1
+        return label
+
+    def rebuild(self):
+        """ labels every cell from scratch, one flood fill per component
+        """
+        maze = self.maze
+        offsets, targets, _ = maze.adjacency()
+        walls = maze.wall_plane()
+        self.labels = array("l", [-1]) * maze.size
+        self.sizes = {}
+        self._next_label = 0
+        labels = self.labels
+        for seed in range(maze.size):
+            if walls[seed] or labels[seed] != -1:
+                continue
+            label = self._new_label()
+            labels[seed] = label
+            queue = deque([seed])
+            count = 0
+            while queue:
+                node = queue.popleft()
+                count += 1
+                for i in range(offsets[node], offsets[node + 1]):
+                    target = targets[i]
+                    if labels[target] == -1:
+                        labels[target] = label
+                        queue.append(target)
+            self.sizes[label] = count
+        self.version = maze.version
+
+    def _relabel(self, seed: int, old: int, new: int) -> int:
+        """ floods the cells labelled old that are connected to seed with
+            new, returns how many were changed
+        """
+        labels = self.labels
+        labels[seed] = new
+        queue = deque([seed])
+        count = 0
+        while queue:
+            node = queue.popleft()
+            count += 1
+            for target in self._neighbours(node):
+                if labels[target] == old:
+                    labels[target] = new
+                    queue.append(target)
+        return count
+
+    def _opened(self, index: int):
+        """ a wall at index became passable """
+        labels, sizes = self.labels, self.sizes
+        neighbours = self._neighbours(index)
+        joined = {labels[n]: n for n in neighbours}
+        if not joined:
+            label = self._new_label()
+            labels[index] = label
+            sizes[label] = 1
+            return
+
+        biggest = max(joined, key=lambda label: sizes[label])
+        labels[index] = biggest
+        sizes[biggest] += 1
+        for label, seed in joined.items():
+            if label != biggest:
+                sizes[biggest] += self._relabel(seed, label, biggest)
+                del sizes[label]
+
+    def _closed(self, index: int):
+        """ a passable cell at index became a wall """
+        labels, sizes = self.labels, self.sizes
+        label = labels[index]
+        labels[index] = -1
+        sizes[label] -= 1
+        neighbours = self._neighbours(index)
+        if not neighbours:
+            del sizes[label]
+            return
+        if len(neighbours) == 1:
+            return
+
+        # one flood per neighbour, expanded in turns. floods that meet are
+        # merged (union find over the neighbour ids), a flood group with no
+        # cells left is cut off from the rest and gets a new label
+        group = list(range(len(neighbours)))
+
+        def find(i: int) -> int:
+            while group[i] != i:
+                group[i] = group[group[i]]
+                i = group[i]
+            return i
+
+        owner = {n: i for i, n in enumerate(neighbours)}
+        queues = [deque([n]) for n in neighbours]
+        finished = set()
+        while True:
+            roots = {find(i) for i in range(len(neighbours))} - finished
+            # done once the floods left all belong to one piece,
+            # that piece keeps the old label
+            if len(roots) <= 1:
+                # all pieces may have run dry in the same turn
+                if not sizes[label]:
+                    del sizes[label]
+                return
+            active = {find(i) for i, queue in enumerate(queues) if queue}
+            cut_off = roots - active
+            for root in cut_off:
+                new = self._new_label()
+                count = 0
+                for cell, i in owner.items():
+                    if find(i) == root:
+                        labels[cell] = new
+                        count += 1
+                sizes[new] = count
+                sizes[label] -= count
+                finished.add(root)
+            if cut_off:
+                continue
+
+            for i, queue in enumerate(queues):
+                if not queue:
+                    continue
+                node = queue.popleft()
+                for target in self._neighbours(node):
+                    other = owner.get(target)
+                    if other is None:
+                        owner[target] = i
+                        queue.append(target)
+                    elif find(other) != find(i):
+                        group[find(other)] = find(i)
+
+    def cell_changed(self, index: int | None, was_wall: bool | None):
+        """ follow up on an edit of the maze (see Maze._edited())
+            index is None for edits that do not touch the grid
+        """
+        if self.version != self.maze.version - 1:
+            # missed an edit somewhere, start over
+            self.rebuild()
+            return
+        if index is not None:
+            is_wall = self.maze.is_wall_index(index)
+            if was_wall and not is_wall:
+                self._opened(index)
+            elif is_wall and not was_wall:
+                self._closed(index)
+        self.version = self.maze.version
+
+    def label(self, index: int) -> int:
+        """ component label of a cell, -1 for walls """
+        if self.version != self.maze.version:
+            self.rebuild()
+        return self.labels[index]
+
+    @property
+    def components(self) -> int:
+        """ number of connected components """
+        if self.version != self.maze.version:
+            self.rebuild()
+        return len(self.sizes)
@@ -2,10 +2,23 @@
 # proper comment formatting
 # under the hood:
 # move history, update view, stats
+from array import array
 from pathlib import Path
-from helpers.maze import Maze
+from helpers import maze_binary, maze_registry
+from helpers.grid_storage import hole_chance_from_plane
+from helpers.hole_rng import HoleRNG
+# action ids as used by step() and in the order of action_space
+from helpers.maze import LEFT, RIGHT, UP, DOWN
 from helpers.maze_view import MazeView
 
+# rewards handed out by step(), can be overridden per agent
+DEFAULT_REWARDS = {
+    "step": -0.1,
+    "wall": -0.75,
+    "hole": -1.0,
+    "goal": 2.0,
+}
+
 
 def pixel(x: int, y: int, icon=" @ ") -> dict:
     """ helper for creating "pixels" fit to be passed to
@@ -21,9 +34,11 @@ class InvalidMazeAction(Exception):
 
 class MazeAgentAccess:
 
-    def __init__(self, name: str, maze_foldername: str):
+    def __init__(self, name: str, maze_foldername: str,
+                 seed: int | None = None):
         """ create a new acent
             maze_foldername is a folder (ex. Lab_4x4, Lab_6x6, ...)
+            seed makes the hole rolls repeatable (see seed())
 
             :raises
                 FileNotFoundError if bad maze folder/file is passed
@@ -32,8 +47,13 @@ class MazeAgentAccess:
         self.folder = (Path(__file__).resolve().parent
                        / "mazes" / maze_foldername)
 
-        with open(self.folder / "map.json") as file:
-            self.maze = Maze.create_from_json(file)
+        # a binary map (map.mzb) is preferred, it loads without parsing
+        # mazes come from the shared registry, parsed once per process.
+        # each agent gets its own copy-on-write share of the grid
+        maze_file = self.folder / maze_binary.FILE_NAME
+        if not maze_file.is_file():
+            maze_file = self.folder / "map.json"
+        self.maze = maze_registry.registry.load(maze_file)
 
         self.mv = MazeView(name=f"{self.name} @ {self.maze.name}",
                            maze=self.maze)
@@ -43,11 +63,21 @@ class MazeAgentAccess:
         self.mv.add_fg_pixel(pixel(x, y))
         self._in_hole = False
         self._in_hole_set_for = (-1, -1)
+        # hole rolls of this agent, see seed()
+        self.rng = HoleRNG(seed)
 
         self.draw_steps = True
         self.draw_trace = False
         self.step_over_holes = False
 
+        self.rewards = dict(DEFAULT_REWARDS)
+        # next state table for step(), built on first use
+        # and rebuilt whenever the maze version changes
+        self._transitions = None
+        self._hole_chances = None
+        self._goal_state = -1
+        self._transitions_version = -1
+
     @property
     def pos_x(self) -> int:
         return self._pos_x
@@ -56,6 +86,11 @@ class MazeAgentAccess:
     def pos_y(self) -> int:
         return self._pos_y
 
+    @property
+    def state(self) -> int:
+        """ the current position as a flat index (state ID) """
+        return self._pos_x + self._pos_y * self.maze.dim_x
+
     @property
     def states(self) -> int:
         """ this is the number of grid cells in the environment """
@@ -91,7 +126,7 @@ class MazeAgentAccess:
             # this is needed in case of probabilistic holes, to avoid
             # re-rolls, unless the state has changes
             if (to_x, to_y) != self._in_hole_set_for:
-                self._in_hole = self.maze.roll_hole(to_x, to_y)
+                self._in_hole = self.maze.roll_hole(to_x, to_y, self.rng)
                 self._in_hole_set_for = (to_x, to_y)
             # live marking of agents position or path/trace
             if self.draw_steps:
@@ -190,6 +225,86 @@ class MazeAgentAccess:
         to_y = self.pos_y + 1
         return self._move(to_x, to_y)
 
+    def _build_transitions(self):
+        """ precomputes the next state for every (state, action) pair
+            stored flat: next_state = T[state * actions + action]
+            blocked moves lead back into the same state
+            also caches the hole chance per state (0 for start, goal, walls)
+        """
+        maze = self.maze
+        dim_x = maze.dim_x
+        size = maze.size
+        walls = maze.wall_plane()
+        holes = maze.hole_plane()
+        transitions = array("l", [0]) * (size * self.actions)
+        hole_chances = array("d", [0.0]) * size
+        for s in range(size):
+            x = s % dim_x
+            row = s * self.actions
+            transitions[row + LEFT] = (
+                s - 1 if x > 0 and not walls[s - 1] else s)
+            transitions[row + RIGHT] = (
+                s + 1 if x < dim_x - 1 and not walls[s + 1] else s)
+            transitions[row + UP] = (
+                s - dim_x if s >= dim_x and not walls[s - dim_x] else s)
+            transitions[row + DOWN] = (
+                s + dim_x if s + dim_x < size and not walls[s + dim_x]
+                else s)
+            if holes[s] and not walls[s]:
+                hole_chances[s] = hole_chance_from_plane(holes[s])
+        x, y = maze.start
+        hole_chances[maze.flatten(x, y)] = 0
+        x, y = maze.goal
+        self._goal_state = maze.flatten(x, y)
+        hole_chances[self._goal_state] = 0
+
+        self._transitions = transitions
+        self._hole_chances = hole_chances
+        self._transitions_version = maze.version
+
+    def step(self, action: int) -> tuple[int, float, bool]:
+        """ headless training step, takes an action id
+            (LEFT, RIGHT, UP, DOWN - same order as action_space)
+            returns (state, reward, done), done on goal or hole
+            the view is not updated, so nothing is drawn. use the step_
+            methods or trace_path() when watching
+
+            :raises
+                InvalidMazeAction for bad action ids
+        """
+        if not 0 <= action < 4:
+            raise InvalidMazeAction(f"Unknown action id: {action}")
+        if self._transitions_version != self.maze.version:
+            self._build_transitions()
+
+        dim_x = self.maze.dim_x
+        state = self._pos_x + self._pos_y * dim_x
+        if self._in_hole and not self.step_over_holes:
+            return state, self.rewards["hole"], True
+
+        new_state = self._transitions[state * 4 + action]
+        if new_state == state:
+            return state, self.rewards["wall"], False
+
+        self._pos_x = new_state % dim_x
+        self._pos_y = new_state // dim_x
+        self._in_hole = self.rng.roll(self._hole_chances[new_state])
+        self._in_hole_set_for = (self._pos_x, self._pos_y)
+
+        if self._in_hole:
+            return new_state, self.rewards["hole"], True
+        if new_state == self._goal_state:
+            return new_state, self.rewards["goal"], True
+        return new_state, self.rewards["step"], False
+
+    def seed(self, seed: int | None = None, stream: int = 0):
+        """ restarts the hole rolls from seed. stream picks one of the
+            independent sub-streams of the seed, ex. the episode or
+            environment number, so parallel runs roll the same holes no
+            matter how they are split up
+        """
+        self.rng = HoleRNG(seed, stream)
+
     def reset_to_start(self) -> bool:
         x, y = self.maze.start
         self._in_hole = False
@@ -0,0 +1,63 @@
+""" load time benchmark: JSON maze files vs the memory mapped binary format
+"""
+from helpers import maze_binary
+from helpers.maze import Maze
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import random
+
+DIMS = [(12, 10), (200, 200), (1000, 1000)]
+WALL_RATIO = 0.3
+HOLE_RATIO = 0.05
+SEED = 42
+
+
+def generate(dim_x: int, dim_y: int) -> Maze:
+    rng = random.Random(SEED)
+    maze = Maze(name=f"Bench_{dim_x}x{dim_y}", dim_x=dim_x, dim_y=dim_y,
+                storage="array")
+    for y in range(dim_y):
+        for x in range(dim_x):
+            if maze.is_start(x, y) or maze.is_goal(x, y):
+                continue
+            roll = rng.random()
+            if roll < WALL_RATIO:
+                maze.make_wall(x, y)
+            elif roll < WALL_RATIO + HOLE_RATIO:
+                maze.make_hole(x, y, round(rng.random(), 2))
+    return maze
+
+
+def main():
+    print("{:<12}{:>12}{:>12}{:>12}{:>12}".format(
+        "maze", "json KB", "json ms", "binary KB", "binary ms"))
+    with TemporaryDirectory() as tmp:
+        for dim_x, dim_y in DIMS:
+            maze = generate(dim_x, dim_y)
+            json_file = Path(tmp) / "map.json"
+            binary_file = Path(tmp) / maze_binary.FILE_NAME
+            with open(json_file, "w") as file:
+                maze.store_json(file)
+            maze_binary.save(maze, binary_file)
+
+            start = perf_counter()
+            with open(json_file) as file:
+                from_json = Maze.create_from_json(file, storage="array")
+            t_json = perf_counter() - start
+            start = perf_counter()
+            with open(binary_file, "rb") as file:
+                from_binary = Maze.create_from_binary(file)
+            t_binary = perf_counter() - start
+
+            assert from_json.wall_plane() == from_binary.wall_plane()
+            assert from_json.hole_plane() == from_binary.hole_plane()
+            print("{:<12}{:>12.0f}{:>12.1f}{:>12.0f}{:>12.2f}".format(
+                f"{dim_x}x{dim_y}",
+                json_file.stat().st_size / 1024, t_json * 1000,
+                binary_file.stat().st_size / 1024, t_binary * 1000))
+            del from_binary
+
+
+if __name__ == "__main__":
+    main()
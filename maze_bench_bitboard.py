@@ -0,0 +1,86 @@
+""" benchmark for the bit packed wall masks (helpers.bitboard)
+    solvability: component labels vs bitboard flood fill
+    shortest paths: bfs over the adjacency vs bitboard layers
+    every result is cross-checked against the plain searches
+"""
+from helpers.maze import Maze
+from helpers.grid_storage import ArrayStorage
+from helpers import pathfinding
+from time import perf_counter
+import random
+
+DIM = 1000
+# 10^7 cells, only the bitboard is run at this size
+BIG_DIM = 3163
+WALL_RATIO = 0.25
+SEED = 42
+
+
+def random_maze(dim: int) -> Maze:
+    """ dim x dim maze with WALL_RATIO random walls, built on the flat
+        planes directly (make_wall() per cell takes too long at 10^7)
+    """
+    size = dim * dim
+    threshold = int(WALL_RATIO * 256)
+    to_walls = bytes(int(value < threshold) for value in range(256))
+    walls = bytearray(random.Random(SEED).randbytes(size)
+                      .translate(to_walls))
+    # keep start and goal out of walled in pockets
+    for index in (0, 1, dim, size - 1, size - 2, size - 1 - dim):
+        walls[index] = 0
+    return Maze(name="Bench", dim_x=dim, dim_y=dim,
+                storage=ArrayStorage(size, walls=walls))
+
+
+def timed(fn, *args):
+    start = perf_counter()
+    result = fn(*args)
+    return result, perf_counter() - start
+
+
+def solvable_labels(maze: Maze) -> bool:
+    maze._reachability = None
+    return maze.is_solvable()
+
+
+def solvable_bitboard(maze: Maze) -> bool:
+    maze._bitboard = None
+    return maze.is_solvable("bitboard")
+
+
+def main():
+    maze = random_maze(DIM)
+    print(f"{DIM}x{DIM} = {maze.size} cells\n")
+    print("{:<24}{:>12}{:>12}".format("", "result", "time s"))
+    solvable, t_labels = timed(solvable_labels, maze)
+    check, t_bits = timed(solvable_bitboard, maze)
+    assert solvable == check
+    print("{:<24}{:>12}{:>12.3f}".format("solvable, labels",
+                                         str(solvable), t_labels))
+    print("{:<24}{:>12}{:>12.3f}".format("solvable, bitboard",
+                                         str(check), t_bits))
+
+    (path, _), t_bfs = timed(pathfinding.bfs, maze)
+    (check, _), t_bits = timed(pathfinding.bitboard_bfs, maze)
+    assert (path is None) == (check is None)
+    length = -1 if path is None else len(path)
+    assert check is None or len(check) == length
+    print("{:<24}{:>12}{:>12.3f}".format("path length, bfs", length, t_bfs))
+    print("{:<24}{:>12}{:>12.3f}".format("path length, bitboard", length,
+                                         t_bits))
+
+    maze = random_maze(BIG_DIM)
+    print(f"\n{BIG_DIM}x{BIG_DIM} = {maze.size} cells\n")
+    _, t_build = timed(maze.bitboard)
+    solvable, t_solve = timed(maze.is_solvable, "bitboard")
+    rows, t_fill = timed(maze.bitboard().flood, 0)
+    print("{:<24}{:>12}{:>12.3f}".format("bitboard build", "", t_build))
+    print("{:<24}{:>12}{:>12.3f}".format("solvable, bitboard",
+                                         str(solvable), t_solve))
+    print("{:<24}{:>12}{:>12.3f}".format(
+        "cells reached, bitboard", sum(row.bit_count() for row in rows),
+        t_fill))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+""" benchmark for hierarchical pathfinding (helpers.hierarchical)
+    on DIM x DIM mazes, open floor and random walls:
+        building the cluster graph
+        random start / goal queries, against flat A* on a few of them
+        a wall edit followed by a query (only the touched clusters are
+        rebuilt)
+    path lengths are compared to the shortest ones flat A* finds, the
+    query rate against QUERY_TARGET
+"""
+from helpers.maze import Maze
+from helpers.grid_storage import ArrayStorage
+from helpers import pathfinding
+from time import perf_counter
+import random
+
+DIM = 2000
+MAZES = [("open", 0.0), ("10% walls", 0.1)]
+QUERIES = 200
+# flat A* takes seconds per query at this size
+FLAT_QUERIES = 3
+EDITS = 50
+# hierarchical queries per second to reach on every maze
+QUERY_TARGET = 200
+SEED = 42
+
+
+def random_maze(wall_ratio: float) -> Maze:
+    """ maze with random walls, built on the flat planes directly """
+    size = DIM * DIM
+    threshold = int(wall_ratio * 256)
+    to_walls = bytes(int(value < threshold) for value in range(256))
+    walls = bytearray(random.Random(SEED).randbytes(size)
+                      .translate(to_walls))
+    walls[0] = walls[-1] = 0
+    return Maze(name="Bench", dim_x=DIM, dim_y=DIM,
+                storage=ArrayStorage(size, walls=walls))
+
+
+def passable_cells(maze: Maze, count: int, rng: random.Random) -> list:
+    cells = []
+    while len(cells) < count:
+        index = rng.randrange(maze.size)
+        if not maze.is_wall_index(index):
+            cells.append(maze.unflatten(index))
+    return cells
+
+
+def timed(fn, *args):
+    start = perf_counter()
+    result = fn(*args)
+    return result, perf_counter() - start
+
+
+def main():
+    print(f"{DIM}x{DIM} = {DIM * DIM} cells\n")
+    for label, wall_ratio in MAZES:
+        rng = random.Random(SEED)
+        maze = random_maze(wall_ratio)
+        hierarchy = maze.hierarchy()
+        # the first query builds all clusters
+        _, t_build = timed(pathfinding.hierarchical, maze)
+        ends = passable_cells(maze, 2 * QUERIES, rng)
+        queries = list(zip(ends[::2], ends[1::2]))
+
+        expanded = 0
+        start_time = perf_counter()
+        results = []
+        for start, goal in queries:
+            path, count = pathfinding.hierarchical(maze, start, goal)
+            results.append(path)
+            expanded += count
+        t_query = (perf_counter() - start_time) / QUERIES
+        print(f"{label}, {hierarchy.columns * hierarchy.rows} clusters, "
+              f"{hierarchy.entrances} entrance cells")
+        print(f"  build                   {t_build:8.2f} s")
+        print(f"  hierarchical query      {t_query * 1000:8.2f} ms "
+              f"({1 / t_query:.0f} per second, "
+              f"{expanded / QUERIES:.0f} nodes expanded)")
+        print(f"  target {QUERY_TARGET} per second    "
+              f"{'met' if 1 / t_query >= QUERY_TARGET else 'MISSED'}")
+
+        maze.adjacency()
+        start_time = perf_counter()
+        expanded = 0
+        detour = []
+        for (start, goal), path in list(zip(queries, results))[
+                :FLAT_QUERIES]:
+            shortest, count = pathfinding.astar(maze, start, goal)
+            expanded += count
+            assert (path is None) == (shortest is None)
+            if path is not None:
+                detour.append(len(path) / max(len(shortest), 1))
+        t_flat = (perf_counter() - start_time) / FLAT_QUERIES
+        print(f"  flat A* query           {t_flat * 1000:8.2f} ms "
+              f"({expanded / FLAT_QUERIES:.0f} nodes expanded)")
+        if detour:
+            print(f"  path length / shortest  "
+                  f"{sum(detour) / len(detour):8.3f}")
+
+        start_time = perf_counter()
+        walls = passable_cells(maze, EDITS, rng)
+        for (x, y), (start, goal) in zip(walls, queries):
+            if (x, y) not in (maze.start, maze.goal):
+                maze.make_wall(x, y)
+            pathfinding.hierarchical(maze, start, goal)
+        t_edit = (perf_counter() - start_time) / EDITS
+        print(f"  make_wall + query       {t_edit * 1000:8.2f} ms\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+""" benchmark for lock free parallel Q-learning on one shared Q-table
+    (shared_qtable.SharedQTable, Hogwild style): every worker process has
+    its own agent, hole roll stream and exploration seed and updates the
+    same table. the episodes are split between the workers, the updates
+    per second are compared for a growing number of workers. afterwards
+    the greedy policy of the table must reach the goal
+"""
+from maze_agent_access import MazeAgentAccess as Maa
+from q_learner import QLearner
+from shared_qtable import SharedQTable
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import random
+
+MAZE_NAMES = ["Lab_12x10", "FrozenLake_12x10"]
+WORKERS = [1, 2, 4]
+EPISODES = 2000
+MAX_STEPS_FACTOR = 10
+SEED = 42
+
+ALPHA = 0.5
+GAMMA = 0.9
+EPSILON = 0.5
+
+
+def worker(maze_name: str, table_name: str, number: int,
+           episodes: int) -> int:
+    """ trains episodes episodes on the shared table, returns the number
+        of updates
+    """
+    agent = Maa(name=f"Worker {number}", maze_foldername=maze_name)
+    agent.seed(SEED, stream=number)
+    random.seed(f"{SEED}/{number}")
+    ql = QLearner(filename="not set",
+                  states=agent.states,
+                  actions=agent.actions,
+                  alpha=ALPHA,
+                  gamma=GAMMA,
+                  epsilon=EPSILON)
+    ql.qtable = SharedQTable.attach(table_name, agent.states, agent.actions)
+    max_steps = agent.states * MAX_STEPS_FACTOR
+    updates = 0
+    for _ in range(episodes):
+        agent.reset_to_start()
+        state = agent.state
+        for _ in range(max_steps):
+            action = ql.epsilon_greedy_action(state)
+            new_state, reward, done = agent.step(action)
+            ql.update_q(state, action, new_state, reward)
+            state = new_state
+            updates += 1
+            if done:
+                break
+    ql.qtable.close()
+    return updates
+
+
+def greedy_reaches_goal(maze_name: str, table: SharedQTable) -> bool:
+    """ the greedy policy walks to the goal (holes stepped over) """
+    agent = Maa(name="Probe", maze_foldername=maze_name)
+    agent.step_over_holes = True
+    agent.reset_to_start()
+    state = agent.state
+    seen = {state}
+    while not agent.is_at_goal:
+        row = table[state]
+        state, _, _ = agent.step(row.tolist().index(max(row)))
+        if state in seen:
+            return False
+        seen.add(state)
+    return True
+
+
+def main():
+    print(f"{EPISODES} episodes split between the workers\n")
+    print("{:<18}{:>8}{:>10}{:>10}{:>14}{:>8}".format(
+        "maze", "workers", "updates", "time s", "updates/s", "goal"))
+    for maze_name in MAZE_NAMES:
+        agent = Maa(name="Bench", maze_foldername=maze_name)
+        for workers in WORKERS:
+            with SharedQTable.create(agent.states, agent.actions) as table:
+                start = perf_counter()
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(worker, maze_name, table.name,
+                                           number, EPISODES // workers)
+                               for number in range(workers)]
+                    updates = sum(future.result() for future in futures)
+                seconds = perf_counter() - start
+                print("{:<18}{:>8}{:>10}{:>10.2f}{:>14.0f}{:>8}".format(
+                    maze_name, workers, updates, seconds, updates / seconds,
+                    "yes" if greedy_reaches_goal(maze_name, table) else "no"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+""" benchmark for jump point search (helpers.pathfinding.jps) against
+    A* and BFS: expansions and time from corner to corner
+        open      - no walls at all
+        sparse    - a few random walls, FrozenLake style
+        corridors - a labyrinth of one cell wide corridors
+    all searches must agree on the path length
+"""
+from helpers.maze import Maze
+from helpers.grid_storage import ArrayStorage
+from helpers import pathfinding
+from time import perf_counter
+import random
+
+DIM = 501
+SPARSE_WALLS = 0.05
+SEED = 42
+SEARCHES = [("bfs", pathfinding.bfs),
+            ("astar", pathfinding.astar),
+            ("jps", pathfinding.jps)]
+
+
+def open_maze(wall_ratio: float) -> bytearray:
+    rng = random.Random(SEED)
+    walls = bytearray(rng.random() < wall_ratio for _ in range(DIM * DIM))
+    # keep start and goal out of walled in pockets
+    for index in (0, 1, DIM, -1, -2, -1 - DIM):
+        walls[index] = 0
+    return walls
+
+
+def corridor_maze() -> bytearray:
+    """ labyrinth carved by an iterative recursive backtracker, rooms on
+        the even cells and the walls between them knocked out
+    """
+    rng = random.Random(SEED)
+    walls = bytearray([1]) * (DIM * DIM)
+    walls[0] = 0
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack[-1]
+        options = [(x + dx, y + dy, dx, dy)
+                   for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 <= x + dx < DIM and 0 <= y + dy < DIM
+                   and walls[(y + dy) * DIM + x + dx]]
+        if not options:
+            stack.pop()
+            continue
+        new_x, new_y, dx, dy = rng.choice(options)
+        walls[(y + dy // 2) * DIM + x + dx // 2] = 0
+        walls[new_y * DIM + new_x] = 0
+        stack.append((new_x, new_y))
+    return walls
+
+
+def timed(fn, *args):
+    start = perf_counter()
+    result = fn(*args)
+    return result, perf_counter() - start
+
+
+def main():
+    mazes = [("open", open_maze(0)),
+             ("sparse", open_maze(SPARSE_WALLS)),
+             ("corridors", corridor_maze())]
+    print(f"{DIM}x{DIM}, corner to corner\n")
+    print("{:<12}{:<8}{:>10}{:>12}{:>10}".format(
+        "maze", "search", "length", "expanded", "time s"))
+    for label, walls in mazes:
+        maze = Maze(name=label, dim_x=DIM, dim_y=DIM,
+                    storage=ArrayStorage(DIM * DIM, walls=walls))
+        # built once per maze, shared by bfs and astar
+        maze.adjacency()
+        lengths = set()
+        for name, search in SEARCHES:
+            (path, expanded), seconds = timed(search, maze)
+            length = -1 if path is None else len(path)
+            lengths.add(length)
+            print("{:<12}{:<8}{:>10}{:>12}{:>10.3f}".format(
+                label, name, length, expanded, seconds))
+        assert len(lengths) == 1
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+""" benchmark for the model based planners (planner.Planner)
+    value iteration and policy iteration on the demo mazes, both must end
+    up with the same values, the greedy policy of the plan is run
+    on a DIM x DIM maze with random walls and holes only policy iteration
+    runs (value iteration needs minutes there, set BIG_VALUE_ITERATION to
+    compare anyway), its values are checked to satisfy the Bellman
+    optimality equation
+"""
+from maze_agent_access import MazeAgentAccess as Maa
+from helpers.maze import Maze
+from helpers.grid_storage import ArrayStorage
+from planner import Planner
+from time import perf_counter
+from array import array
+import numpy as np
+import random
+
+MAZE_NAMES = ["FrozenLake_12x10", "Lab_12x10"]
+DIM = 1000
+WALL_RATIO = 0.2
+HOLE_RATIO = 0.05
+HOLE_CHANCE = 0.5
+GAMMA = 0.99
+SEED = 42
+BIG_VALUE_ITERATION = False
+
+
+def random_maze() -> Maze:
+    rng = random.Random(SEED)
+    size = DIM * DIM
+    walls = bytearray(size)
+    holes = array("f", bytes(4 * size))
+    for index in range(size):
+        roll = rng.random()
+        if roll < WALL_RATIO:
+            walls[index] = 1
+        elif roll < WALL_RATIO + HOLE_RATIO:
+            holes[index] = HOLE_CHANCE
+    # keep start and goal out of walled in pockets
+    for index in (0, 1, DIM, -1, -2, -1 - DIM):
+        walls[index] = 0
+        holes[index] = 0
+    return Maze(name="Bench", dim_x=DIM, dim_y=DIM,
+                storage=ArrayStorage(size, walls=walls, holes=holes))
+
+
+def timed(fn, *args):
+    start = perf_counter()
+    result = fn(*args)
+    return result, perf_counter() - start
+
+
+def run_policy(agent: Maa, qtable: np.ndarray) -> int:
+    """ greedy steps from the start to the goal, -1 if it gets stuck """
+    agent.reset_to_start()
+    for steps in range(1, agent.maze.size + 1):
+        _, _, done = agent.step(int(qtable[agent.state].argmax()))
+        if done:
+            return steps if agent.is_at_goal else -1
+    return -1
+
+
+def plan(label: str, planner: Planner,
+         value_iteration: bool = True) -> np.ndarray:
+    start = planner.maze.flatten(*planner.maze.start)
+    q_pi, t_pi = timed(planner.policy_iteration)
+    if value_iteration:
+        q_vi, t_vi = timed(planner.value_iteration)
+        print(f"{label:<18}{'value iteration':<18}{planner.sweeps:>8} sweeps"
+              f"{t_vi:>10.3f} s   V(start) {q_vi[start].max():.4f}")
+        label = ""
+        assert np.allclose(q_vi, q_pi, atol=1e-4)
+    print(f"{label:<18}{'policy iteration':<18}{planner.rounds:>8} rounds"
+          f"{t_pi:>10.3f} s   V(start) {q_pi[start].max():.4f}")
+    # one more sweep must not change the optimal values
+    residual = np.abs(planner.q_values(q_pi.max(axis=1)) - q_pi).max()
+    print(f"{'':<18}Bellman residual {residual:.2e}")
+    assert residual < 1e-4
+    return q_pi
+
+
+def main():
+    for maze_name in MAZE_NAMES:
+        agent = Maa(name="Bench", maze_foldername=maze_name, seed=SEED)
+        qtable = plan(maze_name, Planner(agent.maze, GAMMA, agent.rewards))
+        print(f"{'':<18}greedy policy reaches the goal in "
+              f"{run_policy(agent, qtable)} steps\n")
+
+    maze = random_maze()
+    print(f"{DIM}x{DIM} = {maze.size} states, {WALL_RATIO:.0%} walls, "
+          f"{HOLE_RATIO:.0%} holes")
+    planner, t_model = timed(Planner, maze, GAMMA)
+    print(f"{'':<18}{'model':<18}{'':>15}{t_model:>10.3f} s")
+    plan("random", planner, value_iteration=BIG_VALUE_ITERATION)
+
+
+if __name__ == "__main__":
+    main()
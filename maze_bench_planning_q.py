@@ -0,0 +1,85 @@
+""" benchmark for the planning mode of QLearner (update_q_planning, a
+    prioritized sweeping replay of the learned transitions) against plain
+    Q-learning: real steps and time until the greedy policy walks a
+    shortest path to the goal
+"""
+from maze_agent_access import MazeAgentAccess as Maa
+from q_learner import QLearner
+from time import perf_counter
+import random
+
+MAZE_NAME = "Lab_12x10"
+EPISODES = 1000
+MAX_STEPS_FACTOR = 10
+# replayed updates per real step, 0 = plain Q-learning
+PLANNING_STEPS = [0, 5, 20, 50]
+SEED = 42
+
+ALPHA = 0.5
+# the demos 0.5 leaves almost nothing of the goal reward after the 18
+# steps of this maze, a longer horizon makes the shortest path stand out
+GAMMA = 0.9
+EPSILON = 0.5
+
+
+def greedy_steps(agent: Maa, ql: QLearner) -> int:
+    """ steps the greedy policy takes to the goal, -1 if it doesn't """
+    agent.reset_to_start()
+    state = agent.state
+    for steps in range(1, agent.states + 1):
+        action_qs = ql.qtable[state]
+        state, _, done = agent.step(action_qs.index(max(action_qs)))
+        if done:
+            return steps if agent.is_at_goal else -1
+    return -1
+
+
+def train(planning_steps: int) -> tuple[int, int, int, float]:
+    """ returns (episodes, real steps, planning updates, seconds) until
+        convergence, episodes is -1 if it never converges
+    """
+    random.seed(SEED)
+    agent = Maa(name="Bench", maze_foldername=MAZE_NAME, seed=SEED)
+    probe = Maa(name="Probe", maze_foldername=MAZE_NAME, seed=SEED)
+    shortest = agent.maze.distance_field().distance(agent.state)
+    ql = QLearner(filename="not set",
+                  states=agent.states,
+                  actions=agent.actions,
+                  alpha=ALPHA,
+                  gamma=GAMMA,
+                  epsilon=EPSILON,
+                  planning_steps=planning_steps)
+    max_steps = agent.states * MAX_STEPS_FACTOR
+    real_steps = 0
+    seconds = 0.0
+    for episode in range(1, EPISODES + 1):
+        start = perf_counter()
+        agent.reset_to_start()
+        state = agent.state
+        for _ in range(max_steps):
+            action = ql.epsilon_greedy_action(state)
+            new_state, reward, done = agent.step(action)
+            ql.update_q_planning(state, action, new_state, reward)
+            state = new_state
+            real_steps += 1
+            if done:
+                break
+        seconds += perf_counter() - start
+        # the check is not timed
+        if greedy_steps(probe, ql) == shortest:
+            return episode, real_steps, ql.planning_updates, seconds
+    return -1, real_steps, ql.planning_updates, seconds
+
+
+def main():
+    print(f"{MAZE_NAME}, converged = greedy policy walks a shortest path\n")
+    print("{:>10}{:>10}{:>12}{:>12}{:>10}".format(
+        "planning", "episodes", "real steps", "replayed", "time s"))
+    for planning_steps in PLANNING_STEPS:
+        episodes, real_steps, replayed, seconds = train(planning_steps)
+        print("{:>10}{:>10}{:>12}{:>12}{:>10.3f}".format(
+            planning_steps, episodes, real_steps, replayed, seconds))
+
+
+if __name__ == "__main__":
+    main()
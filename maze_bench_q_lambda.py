@@ -0,0 +1,88 @@
+""" benchmark for Watkins Q(lambda) (QLearner.update_q_lambda) against
+    one step Q-learning: episodes until the greedy policy walks a shortest
+    path to the goal, for a few trace decays (lambda 0 = one step)
+    each setting is trained from a few seeds, the median is shown
+"""
+from maze_agent_access import MazeAgentAccess as Maa
+from q_learner import QLearner
+from statistics import median
+from time import perf_counter
+import random
+
+MAZE_NAME = "Lab_12x10"
+EPISODES = 1000
+MAX_STEPS_FACTOR = 10
+TRACE_DECAYS = [0.0, 0.5, 0.8, 0.9, 0.95]
+SEEDS = range(10)
+
+ALPHA = 0.5
+# see maze_bench_planning_q, the demos 0.5 hardly reaches back 18 steps
+GAMMA = 0.9
+EPSILON = 0.5
+
+
+def greedy_steps(agent: Maa, ql: QLearner) -> int:
+    """ steps the greedy policy takes to the goal, -1 if it doesn't """
+    agent.reset_to_start()
+    state = agent.state
+    for steps in range(1, agent.states + 1):
+        action_qs = ql.qtable[state]
+        state, _, done = agent.step(action_qs.index(max(action_qs)))
+        if done:
+            return steps if agent.is_at_goal else -1
+    return -1
+
+
+def train(trace_decay: float, seed: int) -> tuple[int, int]:
+    """ returns (episodes, real steps) until convergence, episodes is -1
+        if it never converges
+    """
+    random.seed(seed)
+    agent = Maa(name="Bench", maze_foldername=MAZE_NAME, seed=seed)
+    probe = Maa(name="Probe", maze_foldername=MAZE_NAME, seed=seed)
+    shortest = agent.maze.distance_field().distance(agent.state)
+    ql = QLearner(filename="not set",
+                  states=agent.states,
+                  actions=agent.actions,
+                  alpha=ALPHA,
+                  gamma=GAMMA,
+                  epsilon=EPSILON,
+                  trace_decay=trace_decay)
+    max_steps = agent.states * MAX_STEPS_FACTOR
+    real_steps = 0
+    for episode in range(1, EPISODES + 1):
+        agent.reset_to_start()
+        ql.reset_traces()
+        state = agent.state
+        action = ql.epsilon_greedy_action(state)
+        for _ in range(max_steps):
+            new_state, reward, done = agent.step(action)
+            next_action = None if done else ql.epsilon_greedy_action(
+                new_state)
+            ql.update_q_lambda(state, action, new_state, reward, next_action)
+            state, action = new_state, next_action
+            real_steps += 1
+            if done:
+                break
+        if greedy_steps(probe, ql) == shortest:
+            return episode, real_steps
+    return -1, real_steps
+
+
+def main():
+    print(f"{MAZE_NAME}, converged = greedy policy walks a shortest path, "
+          f"median of {len(SEEDS)} seeds\n")
+    print("{:>8}{:>10}{:>12}{:>10}".format(
+        "lambda", "episodes", "real steps", "time s"))
+    for trace_decay in TRACE_DECAYS:
+        start = perf_counter()
+        runs = [train(trace_decay, seed) for seed in SEEDS]
+        seconds = (perf_counter() - start) / len(SEEDS)
+        episodes = median(EPISODES + 1 if run[0] < 0 else run[0]
+                          for run in runs)
+        print("{:>8}{:>10}{:>12}{:>10.3f}".format(
+            trace_decay, episodes, median(run[1] for run in runs), seconds))
+
+
+if __name__ == "__main__":
+    main()
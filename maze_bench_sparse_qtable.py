@@ -0,0 +1,114 @@
+""" memory of the Q-table backends on a DIM x DIM labyrinth
+    (one cell wide corridors, about half the cells are walls):
+        list    a list of floats per state
+        numpy   one dense float64 array
+        sparse  rows only for the states the agent got to, walls never
+                get one (QLearner(backend="sparse", walls=...))
+    every backend learns on the same STEPS steps of epsilon greedy
+    exploration from the start, memory is measured with tracemalloc
+    (the sparse figure includes its copy of the walls)
+"""
+from helpers.maze import Maze
+from helpers.grid_storage import ArrayStorage
+from q_learner import QLearner
+from vec_maze import build_transition_table
+from time import perf_counter
+import tracemalloc
+import random
+
+DIM = 2000
+STEPS = 200_000
+SEED = 42
+BACKENDS = ["list", "numpy", "sparse"]
+
+REWARD_STEP = -0.1
+REWARD_GOAL = 2.0
+
+
+def labyrinth() -> Maze:
+    """ carved by an iterative recursive backtracker, rooms on the even
+        cells and the walls between them knocked out
+    """
+    rng = random.Random(SEED)
+    walls = bytearray([1]) * (DIM * DIM)
+    walls[0] = 0
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack[-1]
+        options = [(x + dx, y + dy, dx, dy)
+                   for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 <= x + dx < DIM and 0 <= y + dy < DIM
+                   and walls[(y + dy) * DIM + x + dx]]
+        if not options:
+            stack.pop()
+            continue
+        new_x, new_y, dx, dy = rng.choice(options)
+        walls[(y + dy // 2) * DIM + x + dx // 2] = 0
+        walls[new_y * DIM + new_x] = 0
+        stack.append((new_x, new_y))
+    maze = Maze(name="Labyrinth", dim_x=DIM, dim_y=DIM,
+                storage=ArrayStorage(DIM * DIM, walls=walls))
+    # the last room, with an even DIM the corner cell is a wall
+    last = DIM - 2 + DIM % 2
+    maze.goal = (last, last)
+    return maze
+
+
+def explore(ql: QLearner, transitions: list, start: int, goal: int):
+    """ STEPS steps of Q-learning, back to the start on the goal """
+    state = start
+    for _ in range(STEPS):
+        action = ql.epsilon_greedy_action(state)
+        new_state = transitions[state][action]
+        reward = REWARD_GOAL if new_state == goal else REWARD_STEP
+        ql.update_q(state, action, new_state, reward)
+        state = start if new_state == goal else new_state
+
+
+def main():
+    maze = labyrinth()
+    walls = maze.wall_plane()
+    passable = maze.size - sum(walls)
+    start = maze.flatten(*maze.start)
+    goal = maze.flatten(*maze.goal)
+    transitions = build_transition_table(maze).tolist()
+    print(f"{DIM}x{DIM} labyrinth, {maze.size} states, "
+          f"{passable} passable ({passable / maze.size:.0%}), "
+          f"{STEPS} steps\n")
+    print("{:<8}{:>12}{:>14}{:>12}{:>10}".format(
+        "backend", "rows", "memory MiB", "steps/s", "build s"))
+    for backend in BACKENDS:
+        random.seed(SEED)
+        tracemalloc.start()
+        start_time = perf_counter()
+        ql = QLearner(filename="not set", states=maze.size, actions=4,
+                      alpha=0.5, gamma=0.9, epsilon=0.5, backend=backend,
+                      walls=walls if backend == "sparse" else None)
+        t_build = perf_counter() - start_time
+        explore(ql, transitions, start, goal)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # timed on a second round, without tracemalloc slowing it down
+        start_time = perf_counter()
+        explore(ql, transitions, start, goal)
+        t_explore = perf_counter() - start_time
+        rows = ql.qtable.rows if backend == "sparse" else maze.size
+        print("{:<8}{:>12}{:>14.1f}{:>12.0f}{:>10.2f}".format(
+            backend, rows, memory / 2 ** 20, STEPS / t_explore, t_build))
+        del ql
+
+    # the most the sparse table can grow to: a row for every passable cell
+    ql = QLearner(filename="not set", states=maze.size, actions=4,
+                  alpha=0.5, gamma=0.9, epsilon=0.5, backend="sparse",
+                  walls=walls)
+    # a plain item write allocates the row as well
+    ql.qtable[start][0] = 1.0
+    assert start in ql.qtable and ql.qtable[start][0] == 1.0
+    for state in range(maze.size):
+        ql.qtable.row_for_update(state)
+    print(f"\nsparse with a row for every passable cell: "
+          f"{ql.qtable.nbytes() / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
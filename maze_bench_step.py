@@ -0,0 +1,63 @@
+""" benchmark for the training step paths of MazeAgentAccess
+    method pointers from action_space (as the demos used to train)
+    vs the headless step() backed by the transition table
+"""
+from maze_agent_access import MazeAgentAccess as Maa
+from time import perf_counter
+import random
+
+MAZES = ["FrozenLake_12x10", "Lab_12x10"]
+STEPS = 200_000
+SEED = 42
+
+
+def run_method_pointers(agent: Maa, actions: list[int]) -> int:
+    """ the old training loop: bound methods + property checks """
+    action_space = agent.action_space
+    dim_x = agent.maze.dim_x
+    episodes = 0
+    for action in actions:
+        action_space[action]()
+        # the old loop derived the state and the flags after every step
+        _ = agent.pos_x + agent.pos_y * dim_x
+        if agent.is_at_goal or agent.is_in_hole:
+            agent.reset_to_start()
+            episodes += 1
+    return episodes
+
+
+def run_step(agent: Maa, actions: list[int]) -> int:
+    """ the headless training loop """
+    step = agent.step
+    episodes = 0
+    for action in actions:
+        _, _, done = step(action)
+        if done:
+            agent.reset_to_start()
+            episodes += 1
+    return episodes
+
+
+def main():
+    rng = random.Random(SEED)
+    actions = [rng.randrange(4) for _ in range(STEPS)]
+    print(f"{STEPS} random steps per run\n")
+    print("{:<20}{:>16}{:>16}{:>10}".format(
+        "maze", "pointers st/s", "step() st/s", "speedup"))
+    for maze_name in MAZES:
+        timings = []
+        episodes = []
+        for runner in [run_method_pointers, run_step]:
+            agent = Maa(name="Bench", maze_foldername=maze_name, seed=SEED)
+            start = perf_counter()
+            episodes.append(runner(agent, actions))
+            timings.append(perf_counter() - start)
+        # same seed, same actions -> same trajectories
+        assert episodes[0] == episodes[1]
+        print("{:<20}{:>16.0f}{:>16.0f}{:>9.1f}x".format(
+            maze_name, STEPS / timings[0], STEPS / timings[1],
+            timings[0] / timings[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+""" memory and speed benchmark for the Maze grid storage engines
+    "cells" (one GridCell object per cell) vs "array" (flat planes)
+    at DIM x DIM cells
+"""
+from helpers.maze import Maze
+from time import perf_counter
+import random
+import tracemalloc
+
+DIM = 1000
+WALL_RATIO = 0.3
+SEED = 42
+
+
+def build(storage: str, walls: list[tuple[int, int]]) -> Maze:
+    maze = Maze(name="bench", dim_x=DIM, dim_y=DIM, storage=storage)
+    for x, y in walls:
+        maze.make_wall(x, y)
+    return maze
+
+
+def scan_api(maze: Maze) -> int:
+    """ count walls through the per cell API """
+    count = 0
+    for y in range(maze.dim_y):
+        for x in range(maze.dim_x):
+            if maze.is_wall(x, y):
+                count += 1
+    return count
+
+
+def scan_bulk(maze: Maze) -> int:
+    """ count walls through the bulk view """
+    return maze.wall_plane().tobytes().count(1)
+
+
+def timed(fn, *args):
+    start = perf_counter()
+    result = fn(*args)
+    return result, perf_counter() - start
+
+
+def main():
+    rng = random.Random(SEED)
+    walls = [(x, y) for y in range(DIM) for x in range(DIM)
+             if rng.random() < WALL_RATIO and (x, y) != (0, 0)
+             and (x, y) != (DIM - 1, DIM - 1)]
+
+    print(f"{DIM}x{DIM} = {DIM * DIM} cells, {len(walls)} walls\n")
+    print("{:<8}{:>12}{:>12}{:>12}{:>12}".format(
+        "storage", "memory MB", "build s", "api scan s", "bulk scan s"))
+    for storage in ["cells", "array"]:
+        tracemalloc.start()
+        maze, t_build = timed(build, storage, walls)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        count_api, t_api = timed(scan_api, maze)
+        count_bulk, t_bulk = timed(scan_bulk, maze)
+        assert count_api == count_bulk == len(walls)
+        print("{:<8}{:>12.1f}{:>12.3f}{:>12.3f}{:>12.4f}".format(
+            storage, memory / 2**20, t_build, t_api, t_bulk))
+        del maze
+
+
+if __name__ == "__main__":
+    main()
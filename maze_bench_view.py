@@ -0,0 +1,80 @@
+""" frames per second of MazeView on a DIM x DIM maze
+    full redraw (the maze ascii art rebuilt every frame, as MazeView used
+    to do) vs the cached background with dirty cell updates
+    every EDIT_EVERY frames a cell of the maze is toggled between wall and
+    floor, the cached view patches just that cell
+"""
+from helpers.maze import Maze
+from helpers.maze_view import MazeView
+from maze_agent_access import pixel
+from time import perf_counter
+import random
+
+DIM = 200
+FRAMES = 200
+WALL_RATIO = 0.2
+SEED = 42
+EDIT_EVERY = 10
+
+
+def full_redraw(view: MazeView) -> str:
+    """ the uncached render path: background + overlay every frame """
+    frame = view.maze.ascii_art_buffer()
+    for entry in view.fg_buffer:
+        frame[entry["y"] + view.offset_y][entry["x"] + view.offset_x] = \
+            entry["icon"][:3]
+    return view.name + "".join("\n" + "".join(line) for line in frame)
+
+
+def random_walk(maze: Maze, steps: int) -> list[tuple[int, int]]:
+    rng = random.Random(SEED)
+    x, y = maze.start
+    positions = []
+    for _ in range(steps):
+        dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        if maze.can_enter(x + dx, y + dy):
+            x, y = x + dx, y + dy
+        positions.append((x, y))
+    return positions
+
+
+def main():
+    rng = random.Random(SEED)
+    maze = Maze(name="Bench", dim_x=DIM, dim_y=DIM)
+    for y in range(DIM):
+        for x in range(DIM):
+            if (rng.random() < WALL_RATIO and not maze.is_start(x, y)
+                    and not maze.is_goal(x, y)):
+                maze.make_wall(x, y)
+    positions = random_walk(maze, FRAMES)
+    edits = [(rng.randrange(1, DIM - 1), rng.randrange(1, DIM - 1))
+             for _ in range(FRAMES // EDIT_EVERY)]
+
+    print(f"{DIM}x{DIM} maze, {FRAMES} frames, one moving agent, "
+          f"a maze edit every {EDIT_EVERY} frames\n")
+    results = {}
+    for label, render in [("full redraw", full_redraw),
+                          ("cached", MazeView.draw_ascii_art)]:
+        # every run edits its own copy of the maze
+        view = MazeView(name="Bench", maze=maze.share())
+        frames = []
+        start = perf_counter()
+        for frame, (x, y) in enumerate(positions):
+            if frame % EDIT_EVERY == 0:
+                edit_x, edit_y = edits[frame // EDIT_EVERY]
+                if view.maze.is_wall(edit_x, edit_y):
+                    view.maze.make_floor(edit_x, edit_y)
+                else:
+                    view.maze.make_wall(edit_x, edit_y)
+            view.clear_fg()
+            view.add_fg_pixel(pixel(x, y))
+            frames.append(render(view))
+        elapsed = perf_counter() - start
+        results[label] = frames
+        print(f"{label:<12}{FRAMES / elapsed:>10.1f} fps")
+
+    assert results["full redraw"] == results["cached"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+""" converts the mazes under mazes/ between JSON and the binary format
+
+    python maze_convert.py Lab_12x10           map.json -> map.mzb
+    python maze_convert.py Lab_12x10 --json    map.mzb  -> map.json
+
+agents load map.mzb first if a folder has one
+"""
+from helpers import maze_binary
+from helpers.maze import Maze
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parent
+MAZES_DIR = BASE_DIR / "mazes"
+
+
+def to_binary(maze_dir: Path):
+    with open(maze_dir / "map.json") as file:
+        maze = Maze.create_from_json(file, storage="array")
+    maze_binary.save(maze, maze_dir / maze_binary.FILE_NAME)
+
+
+def to_json(maze_dir: Path):
+    with open(maze_dir / maze_binary.FILE_NAME, "rb") as file:
+        maze = Maze.create_from_binary(file)
+    with open(maze_dir / "map.json", "w") as file:
+        maze.store_json(file)
+
+
+def main(args: list[str]):
+    if not args or args[0].startswith("-"):
+        print(__doc__)
+        return
+    maze_dir = MAZES_DIR / args[0]
+    if "--json" in args[1:]:
+        to_json(maze_dir)
+        print(f"Wrote {maze_dir / 'map.json'}")
+    else:
+        to_binary(maze_dir)
+        print(f"Wrote {maze_dir / maze_binary.FILE_NAME}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
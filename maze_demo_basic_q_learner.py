@@ -18,6 +18,9 @@ REWARD_HOLE = -1.0
 REWARD_WALL = -0.75
 REWARD_GOAL = 2.0
 REWARD_STEP = -0.1
+# weight of the potential based shaping reward (from the mazes distance to
+# goal field), nudges the agent towards the goal. 0 (off) by default
+REWARD_SHAPING = 0
 
 
 # meta parameters
@@ -72,6 +75,14 @@ def main():
     states = dim_x * dim_y
     max_steps = states * MAX_STEPS_FACTOR
     actions = qagent.action_space
+    # training runs headless through step(), with the demos reward policy
+    qagent.rewards = {
+        "step": REWARD_STEP,
+        "wall": REWARD_WALL,
+        "hole": REWARD_HOLE,
+        "goal": REWARD_GOAL,
+    }
+    distance_field = qagent.maze.distance_field()
     ql = QLearner(filename="not set",
                   states=states,
                   actions=len(actions),
@@ -82,40 +93,33 @@ def main():
 
     print("\nLoaded maze:")
     print(qagent.get_maze_view_buffer())
+    if not qagent.maze.is_solvable():
+        print("The goal can not be reached from the start, nothing to learn")
+        return
     # run learning episodes
     for i in range(EPISODES):
 
         # print(f"Episode: {i}")
         qagent.reset_to_start()
-        next_episode = False
+        state = qagent.state
         for _ in range(max_steps):
-            reward = REWARD_STEP
-            # get current state and choose action
-            state = flatten(qagent.pos_x, qagent.pos_y, dim_x)
+            # choose action, step() takes the action id directly
             action = ql.epsilon_greedy_action(state)
-            # action_fn is a method pointer to one of the move methods
-            action_fn = actions[action]
-            state_changed = action_fn()
-
-            if not state_changed:
-                reward = REWARD_WALL
-            if qagent.is_at_goal:
-                reward = REWARD_GOAL
-                next_episode = True
-            if qagent.is_in_hole:
-                reward = REWARD_HOLE
-                next_episode = True
-
-            # get new state and update the Q Table
-            new_state = flatten(qagent.pos_x, qagent.pos_y, dim_x)
+            new_state, reward, done = qagent.step(action)
+            if REWARD_SHAPING:
+                reward += REWARD_SHAPING * distance_field.shaping_reward(
+                    state, new_state, GAMMA, done)
+
+            # update the Q Table
             ql.update_q(
                 s=state,
                 a=action,
                 s_next=new_state,
                 reward=reward
             )
+            state = new_state
 
-            if next_episode:
+            if done:
                 break
 
     # show a representation of the learned map
@@ -0,0 +1,130 @@
+""" checkpointing a Q-learning run (qtable_binary)
+    the learner is saved every CHECKPOINT_EVERY episodes together with the
+    random states of the run. one run trains straight through, a second
+    one is cut off after CRASH_AFTER episodes and resumed from its last
+    checkpoint, both must end with the same Q-table. this is checked for
+    plain Q-learning, prioritized sweeping (the planning model and queue
+    go into the file) and Q(lambda) (the eligibility traces do)
+    then a big table is saved and memory mapped back in
+"""
+from maze_agent_access import MazeAgentAccess as Maa
+from q_learner import QLearner
+from qtable_binary import random_state, set_random_state
+from pathlib import Path
+from time import perf_counter
+import tempfile
+import random
+import numpy as np
+
+MAZE_NAME = "FrozenLake_12x10"
+EPISODES = 1000
+MAX_STEPS_FACTOR = 10
+CHECKPOINT_EVERY = 100
+CRASH_AFTER = 550
+SEED = 42
+BIG_STATES = 4_000_000
+# learner settings per kind of update
+LEARNERS = {
+    "update_q": {},
+    "update_q_planning": {"planning_steps": 5},
+    "update_q_lambda": {"trace_decay": 0.8},
+}
+
+ALPHA = 0.5
+GAMMA = 0.5
+EPSILON = 0.5
+
+
+def train(agent: Maa, ql: QLearner, update: str, first: int, last: int,
+          path: Path):
+    """ trains the episodes first..last-1 with the update method of ql
+        named update, saving a checkpoint (with the number of the next
+        episode) every CHECKPOINT_EVERY episodes
+    """
+    max_steps = agent.states * MAX_STEPS_FACTOR
+    for episode in range(first, last):
+        agent.reset_to_start()
+        state = agent.state
+        action = ql.epsilon_greedy_action(state)
+        for _ in range(max_steps):
+            new_state, reward, done = agent.step(action)
+            next_action = None if done else ql.epsilon_greedy_action(
+                new_state)
+            if update == "update_q_lambda":
+                ql.update_q_lambda(state, action, new_state, reward,
+                                   next_action)
+            else:
+                getattr(ql, update)(state, action, new_state, reward)
+            state, action = new_state, next_action
+            if done:
+                break
+        if (episode + 1) % CHECKPOINT_EVERY == 0:
+            ql.save(path, maze=agent.maze, state={
+                "episode": episode + 1,
+                "random": random_state(),
+                "holes": agent.rng.getstate(),
+            })
+
+
+def new_run(path: Path, update: str) -> tuple[Maa, QLearner]:
+    random.seed(SEED)
+    agent = Maa(name="Quinn", maze_foldername=MAZE_NAME, seed=SEED)
+    ql = QLearner(filename=path,
+                  states=agent.states,
+                  actions=agent.actions,
+                  alpha=ALPHA,
+                  gamma=GAMMA,
+                  epsilon=EPSILON,
+                  **LEARNERS[update])
+    return agent, ql
+
+
+def resume_matches(folder: str, update: str) -> bool:
+    path = Path(folder) / "straight.qtb"
+    agent, ql = new_run(path, update)
+    train(agent, ql, update, 0, EPISODES, path)
+    straight = ql.qtable
+
+    path = Path(folder) / "resumed.qtb"
+    agent, ql = new_run(path, update)
+    train(agent, ql, update, 0, CRASH_AFTER, path)
+    # crash: everything in memory is lost, only the file is left
+    del agent, ql
+    agent = Maa(name="Quinn", maze_foldername=MAZE_NAME)
+    ql, state = QLearner.load(path, backend="list", maze=agent.maze)
+    set_random_state(state["random"])
+    agent.rng.setstate(state["holes"])
+    train(agent, ql, update, state["episode"], EPISODES, path)
+    return ql.qtable == straight
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        print(f"cut off after {CRASH_AFTER} episodes, resumed from the "
+              f"checkpoint of episode "
+              f"{CRASH_AFTER // CHECKPOINT_EVERY * CHECKPOINT_EVERY}")
+        for update in LEARNERS:
+            matches = resume_matches(folder, update)
+            print(f"  {update:<18} same Q-table as the straight run: "
+                  f"{matches}")
+            assert matches
+
+        path = Path(folder) / "big.qtb"
+        big = QLearner(filename=path, states=BIG_STATES, actions=4,
+                       alpha=ALPHA, gamma=GAMMA, epsilon=EPSILON,
+                       backend="numpy")
+        big.qtable[:] = np.random.default_rng(SEED).random(big.qtable.shape)
+        start = perf_counter()
+        big.save()
+        t_save = perf_counter() - start
+        start = perf_counter()
+        loaded, _ = QLearner.load(path)
+        t_load = perf_counter() - start
+        assert np.array_equal(loaded.qtable, big.qtable)
+        print(f"{BIG_STATES} x 4 table ({path.stat().st_size >> 20} MiB): "
+              f"save {t_save:.3f} s, load {t_load * 1000:.2f} ms")
+        del loaded
+
+
+if __name__ == "__main__":
+    main()
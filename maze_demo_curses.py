@@ -4,9 +4,9 @@ Move with WASD
 Quit with n
 
 Will only run in a console/shell, not in PYCharms run window
-Also needs the console window to be at least (map height + 7) high, or will
-throw scary cryptic errors.
-Make it at least 20.
+Mazes larger than the console are shown through a window that follows the
+agent. Only the cells that changed since the last frame are redrawn, so
+even huge mazes stay responsive.
 
 requires
 pip install windows-curses
@@ -16,6 +16,31 @@ import curses
 
 
 MAZE_NAME = "FrozenLake_12x10"
+# the maze window starts below the message lines
+MAP_TOP = 3
+# every maze cell is 3 characters wide
+CELL_WIDTH = 3
+
+
+def viewport_size(stdscr) -> tuple[int, int]:
+    """ number of maze cells (cols, rows) that fit on the screen
+        the last column stays free, curses fails writing the bottom right
+        corner
+    """
+    height, width = stdscr.getmaxyx()
+    return max(0, (width - 1) // CELL_WIDTH), max(0, height - MAP_TOP)
+
+
+def draw_changes(stdscr, window: list[list[str]],
+                 previous: list[list[str]] | None) -> list[list[str]]:
+    """ writes the cells of window that differ from the previous frame
+        returns window, to be passed as previous next time
+    """
+    for row, line in enumerate(window):
+        for col, icon in enumerate(line):
+            if previous is None or previous[row][col] != icon:
+                stdscr.addstr(MAP_TOP + row, col * CELL_WIDTH, icon)
+    return window
 
 
 def main(stdscr):
@@ -26,21 +51,37 @@ def main(stdscr):
 
     bob = MazeAgentAccess(name="Bob", maze_foldername=MAZE_NAME)
     still_in_the_hole = False
+    screen = None
+    previous = None
     while key != ord("n"):
+        cols, rows = viewport_size(stdscr)
+        if (cols, rows) != screen:
+            # new or resized console, start from a blank screen
+            stdscr.clear()
+            screen = (cols, rows)
+            previous = None
+        width = cols * CELL_WIDTH
 
         if bob.is_at_goal:
             # this prints at cursor - line, column
-            stdscr.addstr(1, 0, "You found the goal square. Press n to e[n]d")
+            message = "You found the goal square. Press n to e[n]d"
         # the hole logic needs to keep state until a valid move was taken,
         # to maintain the correct display
         elif bob.is_in_hole or still_in_the_hole:
-            stdscr.addstr(1, 0, "Oh noes! We well in. Back to the start.    ")
+            message = "Oh noes! We well in. Back to the start."
             still_in_the_hole = True
             bob.reset_to_start()
         else:
-            stdscr.addstr(1, 0, "w, a, s, d to move, n to e[n]d             ")
+            message = "w, a, s, d to move, n to e[n]d"
+        stdscr.addnstr(0, 0, f"{bob.mv.name} ({bob.pos_x}, {bob.pos_y})"
+                       .ljust(width), width)
+        stdscr.addnstr(1, 0, message.ljust(width), width)
 
-        stdscr.addstr(2, 0, bob.get_maze_view_buffer())
+        if cols and rows:
+            left, top = bob.mv.viewport_origin(bob.pos_x, bob.pos_y,
+                                               cols, rows)
+            window = bob.mv.viewport_buffer(left, top, cols, rows)
+            previous = draw_changes(stdscr, window, previous)
         stdscr.refresh()
         curses.curs_set(0)
 
@@ -0,0 +1,42 @@
+""" a parameter sweep of the basic q learner demo on a process pool
+    (experiment_runner). the rows are printed as the runs finish, then the
+    same sweep is run on one worker to check that the results only depend
+    on the seeds and to compare the times
+"""
+from experiment_runner import (RESULTS, grid, sweep, format_header,
+                               format_row)
+from time import perf_counter
+import os
+
+SETTINGS = ["maze", "alpha", "gamma", "seed"]
+
+
+def main():
+    runs = grid(maze=["FrozenLake_12x10", "Lab_12x10"],
+                alpha=[0.1, 0.5, 0.9],
+                gamma=[0.5, 0.9],
+                seed=range(2))
+    workers = os.cpu_count()
+    names = SETTINGS + list(RESULTS)
+    print(f"{len(runs)} runs on {workers} workers\n")
+    print(format_header(names))
+    start = perf_counter()
+    rows = []
+    for row in sweep(runs, workers):
+        print(format_row(row, names))
+        rows.append(row)
+    t_pool = perf_counter() - start
+
+    start = perf_counter()
+    single = list(sweep(runs, workers=1))
+    t_single = perf_counter() - start
+
+    def key(row):
+        return tuple(row[name] for name in SETTINGS)
+    assert sorted(rows, key=key) == sorted(single, key=key)
+    print(f"\n{workers} workers {t_pool:.2f} s, 1 worker {t_single:.2f} s "
+          f"({t_single / t_pool:.2f}x), same results")
+
+
+if __name__ == "__main__":
+    main()
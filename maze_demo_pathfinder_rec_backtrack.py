@@ -9,6 +9,9 @@ def backtrack(x: int, y: int, grid: Maze, visited: set):
         it is a recursive-dfs (depth first search)
         this has time complexity of O(number of cells) = O(n**2) for a matrix
         of dimension n
+        every cell on the way costs one level of recursion, so big mazes
+        hit pythons recursion limit. helpers.pathfinding.dfs() does the
+        same with an explicit stack
     """
     if grid.is_goal(x, y):
         # recursion base case - no further action needed
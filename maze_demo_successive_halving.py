@@ -0,0 +1,44 @@
+""" successive halving (experiment_runner.successive_halving) over
+    random settings of the basic q learner demo: every round the better
+    half goes on training from its Q-table, the rest is dropped
+    compared to training every candidate for the full EPISODES
+"""
+from experiment_runner import (successive_halving, random_sweep,
+                               format_header, format_row)
+from time import perf_counter
+
+MAZE_NAME = "FrozenLake_12x10"
+CANDIDATES = 32
+EPISODES = 1000
+MIN_EPISODES = 50
+SEED = 42
+SHOWN = 3
+
+NAMES = ["alpha", "gamma", "epsilon", "seed", "episodes_trained",
+         "success_rate", "steps_to_goal"]
+
+
+def main():
+    runs = random_sweep(CANDIDATES, SEED,
+                        maze=[MAZE_NAME],
+                        alpha=(0.05, 1.0),
+                        gamma=(0.3, 0.99),
+                        epsilon=(0.05, 0.9))
+    for run in runs:
+        run["episodes"] = EPISODES
+    start = perf_counter()
+    # seed (one per candidate) -> episodes trained so far
+    trained = {}
+    for round_number, rows in successive_halving(runs, MIN_EPISODES):
+        trained.update((row["seed"], row["episodes_trained"]) for row in rows)
+        print(f"\nround {round_number}: {len(rows)} candidates, "
+              f"best {SHOWN}")
+        print(format_header(NAMES))
+        for row in rows[:SHOWN]:
+            print(format_row(row, NAMES))
+    print(f"\n{perf_counter() - start:.2f} s, {sum(trained.values())} "
+          f"episodes trained, a full sweep trains {CANDIDATES * EPISODES}")
+
+
+if __name__ == "__main__":
+    main()
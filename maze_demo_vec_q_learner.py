@@ -0,0 +1,83 @@
+""" Q-learning with many agents at once
+    a VecMaze steps all agents together and a numpy backed QLearner
+    updates the table with every agents transition in one call
+"""
+from maze_agent_access import MazeAgentAccess as Maa
+from q_learner import QLearner
+from vec_maze import VecMaze
+from time import perf_counter
+
+MAZE_NAME = "FrozenLake_12x10"
+# number of agents exploring the maze in parallel
+AGENTS = 1000
+# number of batched steps (every agent takes one step per batch)
+BATCHES = 2000
+SEED = 42
+
+# reward policy
+REWARD_HOLE = -1.0
+REWARD_WALL = -0.75
+REWARD_GOAL = 2.0
+REWARD_STEP = -0.1
+
+# meta parameters
+ALPHA = 0.5  # learning rate. 1: only believe new info, 0: only old info
+GAMMA = 0.5  # temporal discount. 0: only consider current reward
+EPSILON = 0.5  # exploration factor. 1: always explore, 0: always run policy
+
+
+def main():
+    qagent = Maa(name="Quinn", maze_foldername=MAZE_NAME)
+    env = VecMaze(qagent.maze, AGENTS, seed=SEED,
+                  rewards={
+                      "step": REWARD_STEP,
+                      "wall": REWARD_WALL,
+                      "hole": REWARD_HOLE,
+                      "goal": REWARD_GOAL,
+                  })
+    ql = QLearner(filename="not set",
+                  states=env.states,
+                  actions=env.actions,
+                  alpha=ALPHA,
+                  gamma=GAMMA,
+                  epsilon=EPSILON,
+                  backend="numpy",
+                  seed=SEED)
+
+    print("\nLoaded maze:")
+    print(qagent.get_maze_view_buffer())
+    if not qagent.maze.is_solvable():
+        print("The goal can not be reached from the start, nothing to learn")
+        return
+
+    start = perf_counter()
+    states = env.reset()
+    for _ in range(BATCHES):
+        actions = ql.epsilon_greedy_actions(states)
+        next_states, rewards, dones = env.step(actions)
+        ql.update_q_batch(states, actions, next_states, rewards, dones)
+        # finished agents were put back to the start by the env
+        states = env.positions
+    elapsed = perf_counter() - start
+    print(f"\n{AGENTS * BATCHES} transitions in {elapsed:.2f} s, "
+          f"{int(env.episodes.sum())} episodes finished")
+
+    # run the learned policy on the lab
+    print("\nRunning Policy on Lab:")
+    qagent.reset_to_start()
+    ql.epsilon = 0
+    qagent.draw_trace = True
+    actions = qagent.action_space
+    for _ in range(qagent.states * 10):
+        if qagent.is_at_goal:
+            break
+        action = ql.epsilon_greedy_actions([qagent.state])[0]
+        actions[action]()
+        if qagent.is_in_hole:
+            qagent.reset_to_start()
+
+    print(qagent.get_maze_view_buffer())
+
+
+if __name__ == "__main__":
+    main()
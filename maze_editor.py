@@ -1,4 +1,5 @@
 from pathlib import Path
+from helpers import maze_binary
 from helpers.maze import Maze
 from helpers.maze_view import MazeView
 
@@ -60,6 +61,9 @@ def editor(maze: Maze):
     while True:
         # prints current state and explanations
         print(mv.draw_ascii_art())
+        # kept up to date incrementally by the edits below
+        if not maze.is_solvable():
+            print("Warning: the goal can not be reached from the start")
         print("To edit cells format inputs as follows:\n"
               "wall|floor|start|goal x y | hole x y chance\n"
               "x, y are ints with (0,0) top left, chance is float in [0:1]\n"
@@ -99,6 +103,10 @@ def editor(maze: Maze):
             maze_file = MAZES_DIR / maze.name / "map.json"
             with open(maze_file, "w") as file:
                 maze.store_json(file)
+            # keep a binary copy in sync, agents would load it first
+            binary_file = MAZES_DIR / maze.name / maze_binary.FILE_NAME
+            if binary_file.exists():
+                maze_binary.save(maze, binary_file)
             print("Saved, returning to main menu")
             break
         if action in ["d", "discard"]:
@@ -0,0 +1,170 @@
+""" model based planning on a maze
+    the maze is the model: walls, hole chances, start and goal are known,
+    so the optimal Q-table can be computed instead of learned. the model
+    follows MazeAgentAccess.step():
+        a blocked move stays put and costs the wall reward
+        a move into a cell with hole chance p ends the episode with the
+        hole reward with probability p, otherwise it costs the step
+        reward, or ends it with the goal reward on the goal
+    (step_over_holes is not modelled, holes end the episode)
+    the result has the (states, actions) shape of QLearner.qtable, walls
+    and the goal keep all zero rows like in a learned table
+
+    value iteration sweeps the whole table at once, it needs about as many
+    sweeps as the longest path is long: fine for the demo mazes, minutes
+    on a million cells (over a thousand sweeps), use policy iteration
+    there. policy iteration evaluates each policy exactly with pointer
+    doubling (log2 of the path length numpy passes) and starts from the
+    shortest path policy, it handles mazes of a million cells in seconds
+
+    requires numpy
+"""
+from helpers.maze import Maze
+from maze_agent_access import DEFAULT_REWARDS
+from vec_maze import build_transition_table, build_hole_chances
+import numpy as np
+
+
+class Planner:
+    """
+    value / policy iteration on the model of one maze
+    """
+
+    def __init__(self, maze: Maze, gamma: float,
+                 rewards: dict | None = None, dtype: str = "float64"):
+        """ rewards like MazeAgentAccess.rewards, defaults to its
+            DEFAULT_REWARDS (the ones of the q learner demos)
+            gamma must be below 1, otherwise the values of cells that
+            can't reach the goal don't converge
+        """
+        if not 0 <= gamma < 1:
+            raise ValueError("Gamma must be [0:1) for planning")
+        if dtype not in ("float32", "float64"):
+            raise ValueError("dtype must be float32 or float64")
+        self.maze = maze
+        self.gamma = gamma
+        self.rewards = dict(DEFAULT_REWARDS if rewards is None else rewards)
+        self.dtype = dtype
+        # iterations of the last value_iteration() / policy_iteration()
+        self.sweeps = 0
+        self.rounds = 0
+        self._version = -1
+        self._refresh()
+
+    def _refresh(self):
+        """ (re)builds the model if the maze was edited:
+            next state, expected reward and the chance to go on from there
+            (0 on the goal, 1 - hole chance otherwise) per (state, action)
+        """
+        maze = self.maze
+        if self._version == maze.version:
+            return
+        transitions = build_transition_table(maze)
+        hole_chances = build_hole_chances(maze)
+        self._goal = maze.flatten(*maze.goal)
+        states = np.arange(maze.size)[:, np.newaxis]
+
+        blocked = transitions == states
+        into_hole = hole_chances[transitions]
+        into_goal = transitions == self._goal
+        rewards = np.where(into_goal, self.rewards["goal"],
+                           self.rewards["step"])
+        rewards = (into_hole * self.rewards["hole"]
+                   + (1 - into_hole) * rewards)
+        go_on = np.where(into_goal, 0.0, 1 - into_hole)
+        self._rewards = np.where(blocked, self.rewards["wall"], rewards)
+        self._discounts = self.gamma * np.where(blocked, 1.0, go_on)
+        self._transitions = transitions
+        # cells the agent never acts from
+        walls = np.frombuffer(maze.wall_plane(), dtype=np.uint8).astype(bool)
+        walls[self._goal] = True
+        self._idle = walls
+        self._version = maze.version
+
+    def q_values(self, values: np.ndarray) -> np.ndarray:
+        """ one step look ahead: Q(s, a) = R(s, a) + gamma * V(s') """
+        self._refresh()
+        qtable = values[self._transitions]
+        qtable *= self._discounts
+        qtable += self._rewards
+        qtable[self._idle] = 0
+        return qtable.astype(self.dtype, copy=False)
+
+    def value_iteration(self, tol: float = 1e-6,
+                        max_sweeps: int = 100_000,
+                        values: np.ndarray | None = None) -> np.ndarray:
+        """ sweeps V(s) = max_a Q(s, a) over all states until no value
+            changes by more than tol, returns the Q-table
+            values is an optional starting guess (zeros otherwise)
+            meant for small mazes, the sweeps grow with the longest path,
+            big mazes are planned much faster by policy_iteration()
+        """
+        self._refresh()
+        if values is None:
+            values = np.zeros(self.maze.size)
+        self.sweeps = 0
+        transitions, discounts = self._transitions, self._discounts
+        idle = self._idle
+        while self.sweeps < max_sweeps:
+            self.sweeps += 1
+            qtable = values[transitions]
+            qtable *= discounts
+            qtable += self._rewards
+            new_values = qtable.max(axis=1)
+            new_values[idle] = 0
+            change = np.abs(new_values - values).max()
+            values = new_values
+            if change <= tol:
+                break
+        return self.q_values(values)
+
+    def shortest_path_policy(self) -> np.ndarray:
+        """ per state the action towards a neighbour one step closer to
+            the goal (Maze.distance_field()), action 0 where there is none
+        """
+        self._refresh()
+        distances = np.frombuffer(self.maze.distance_field().field(),
+                                  dtype=np.int32)
+        closer = distances[self._transitions] == distances[:, np.newaxis] - 1
+        closer &= distances[:, np.newaxis] > 0
+        return closer.argmax(axis=1)
+
+    def evaluate_policy(self, policy: np.ndarray,
+                        tol: float = 1e-6) -> np.ndarray:
+        """ exact values of a policy. V(s) = r(s) + f(s) * V(n(s)) along
+            the policy is composed with itself: after k passes r and f
+            cover 2^k steps, until f (the discounted chance to still be
+            going) times the largest reward is below tol
+        """
+        self._refresh()
+        states = np.arange(self.maze.size)
+        successor = self._transitions[states, policy]
+        values = self._rewards[states, policy]
+        factor = self._discounts[states, policy]
+        largest = max(abs(reward) for reward in self.rewards.values())
+        bound = largest / (1 - self.gamma)
+        while factor.max() * bound > tol:
+            values = values + factor * values[successor]
+            factor = factor * factor[successor]
+            successor = successor[successor]
+        return values
+
+    def policy_iteration(self, tol: float = 1e-6, max_rounds: int = 1000,
+                         policy: np.ndarray | None = None) -> np.ndarray:
+        """ evaluates the policy and switches every state to its greedy
+            action, until no state switches. returns the Q-table
+            starts from policy, or the shortest path policy
+        """
+        if policy is None:
+            policy = self.shortest_path_policy()
+        states = np.arange(self.maze.size)
+        self.rounds = 0
+        while True:
+            self.rounds += 1
+            qtable = self.q_values(self.evaluate_policy(policy, tol))
+            greedy = qtable.argmax(axis=1)
+            # only switch on a real gain, ties would flip back and forth
+            better = qtable[states, greedy] > qtable[states, policy] + tol
+            if not better.any() or self.rounds >= max_rounds:
+                return qtable
+            policy = np.where(better, greedy, policy)
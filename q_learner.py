@@ -1,4 +1,18 @@
+from __future__ import annotations
 from random import random, randint
+from collections import OrderedDict
+from heapq import heappush, heappop
+from typing import TYPE_CHECKING
+from sparse_qtable import SparseQTable
+if TYPE_CHECKING:
+    # for the annotations only, numpy is imported where it is needed
+    import numpy as np
+
+# Q-table backends: plain python lists, a 2D numpy array or rows allocated
+# on first write
+BACKENDS = ("list", "numpy", "sparse")
+# eligibility traces below this are dropped
+TRACE_CUTOFF = 0.01
 
 
 class QLearner:
@@ -6,7 +20,37 @@ class QLearner:
     def __init__(self,
                  filename,
                  states: int, actions: int,
-                 alpha: float, gamma: float, epsilon: float):
+                 alpha: float, gamma: float, epsilon: float,
+                 backend: str = "list", dtype: str = "float64",
+                 seed: int | None = None,
+                 planning_steps: int = 0, theta: float = 1e-4,
+                 trace_decay: float = 0.0, max_traces: int = 1000,
+                 walls=None):
+        """ backend "list" keeps the table as a list of lists
+            backend "numpy" keeps it as a (states, actions) array of dtype
+            ("float32" or "float64") and enables the batched methods
+            backend "sparse" allocates float64 rows on first write (see
+            sparse_qtable), walls (one byte per state, ex.
+            Maze.wall_plane()) never get one
+            seed only feeds the numpy generator of the batched methods
+            numpy is only imported by the numpy backend and the batched
+            methods, the list and sparse backends run without it
+            planning_steps > 0 turns on the replay of learned transitions
+            in update_q_planning() (prioritized sweeping), theta is the
+            smallest TD error worth replaying
+            trace_decay is the lambda of update_q_lambda(), at most
+            max_traces eligibility traces are kept
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown Q-table backend: {backend}")
+        if dtype not in ("float32", "float64"):
+            raise ValueError("dtype must be float32 or float64")
+        if planning_steps < 0:
+            raise ValueError("Planning steps can not be negative")
+        if not 0 <= trace_decay <= 1:
+            raise ValueError("Trace decay must be [0:1]")
+        if max_traces < 1:
+            raise ValueError("Need room for at least one trace")
 
         self.filename = filename
         self.states = states
@@ -14,8 +58,30 @@ class QLearner:
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
+        self.backend = backend
+        self.dtype = dtype
+        self.walls = walls
+        self._seed = seed
+        self._rng = None
         self.qtable = self.make_qtable()
 
+        self.planning_steps = planning_steps
+        self.theta = theta
+        # learned model: s * actions + a -> (s_next, reward) last seen,
+        # and the (s, a) keys leading into every state (dicts as ordered
+        # sets, so a reloaded learner replays in the same order)
+        self._model = {}
+        self._predecessors = {}
+        # max heap of (-TD error, key), stale entries are skipped
+        self._queue = []
+        self._queued = {}
+        self.planning_updates = 0
+
+        self.trace_decay = trace_decay
+        self.max_traces = max_traces
+        # s * actions + a -> eligibility, least recently visited first
+        self._traces = OrderedDict()
+
     @property
     def alpha(self) -> int:
         return self._alpha
@@ -38,14 +104,22 @@ class QLearner:
 
     @property
     def epsilon(self) -> int:
-        return self._gamma
+        return self._epsilon
 
     @epsilon.setter
     def epsilon(self, epsilon: int):
         if not 0 <= epsilon or epsilon > 1:
-            raise ValueError("Gamma must be [0:1]")
+            raise ValueError("Epsilon must be [0:1]")
         self._epsilon = epsilon
 
+    @property
+    def rng(self):
+        """ numpy generator of the batched methods, made on first use """
+        if self._rng is None:
+            import numpy as np
+            self._rng = np.random.default_rng(self._seed)
+        return self._rng
+
     def update_q(self, s, a, s_next, reward):
         """ update function:
             Q(state, action) =
@@ -53,14 +127,194 @@ class QLearner:
                 ( Reward(s, a) + gamma * max Q(s_next, a_next) )
         """
         q_error = reward + self.gamma * max(self.qtable[s_next])
-        new_q = (1 - self.alpha) * self.qtable[s][a] + self.alpha * q_error
-        self.qtable[s][a] = new_q
+        row = self._row_for_update(s)
+        new_q = (1 - self.alpha) * row[a] + self.alpha * q_error
+        row[a] = new_q
+        return new_q
+
+    def _row_for_update(self, s):
+        """ row of s to write to, the sparse backend hands out the
+            allocated row instead of a stand-in for a new one
+        """
+        if self.backend == "sparse":
+            return self.qtable.row_for_update(s)
+        return self.qtable[s]
+
+    def _td_error(self, key: int) -> float:
+        """ TD error of a transition of the model """
+        s, a = divmod(key, self.actions)
+        s_next, reward = self._model[key]
+        return abs(reward + self.gamma * max(self.qtable[s_next])
+                   - self.qtable[s][a])
+
+    def _push(self, key: int):
+        """ queues a transition of the model if its TD error is big enough
+            and bigger than the one it is already queued with
+        """
+        priority = self._td_error(key)
+        if priority > self.theta and priority > self._queued.get(key, 0):
+            self._queued[key] = priority
+            heappush(self._queue, (-priority, key))
+
+    def update_q_planning(self, s, a, s_next, reward):
+        """ update_q() plus prioritized sweeping: the transition goes into
+            the model, then up to planning_steps transitions of the model
+            are replayed, biggest TD error first. after each replayed
+            update the transitions leading into its state are queued
+            the model keeps the last outcome of every (s, a), random holes
+            are replayed like they turned out the last time
+        """
+        new_q = self.update_q(s, a, s_next, reward)
+        if not self.planning_steps:
+            return new_q
+
+        actions = self.actions
+        key = s * actions + a
+        old = self._model.get(key)
+        if old is not None and old[0] != s_next:
+            self._predecessors[old[0]].pop(key, None)
+        self._model[key] = (s_next, reward)
+        self._predecessors.setdefault(s_next, {})[key] = None
+        # the updated Q(s, a) may change the targets of s's predecessors
+        for before in self._predecessors.get(s, ()):
+            self._push(before)
+
+        queue = self._queue
+        for _ in range(self.planning_steps):
+            while queue and -queue[0][0] != self._queued.get(queue[0][1]):
+                heappop(queue)
+            if not queue:
+                break
+            _, key = heappop(queue)
+            del self._queued[key]
+            state, action = divmod(key, actions)
+            self.update_q(state, action, *self._model[key])
+            self.planning_updates += 1
+            for before in self._predecessors.get(state, ()):
+                self._push(before)
+        return new_q
+
+    def update_q_lambda(self, s, a, s_next, reward, next_action=None):
+        """ Watkins Q(lambda) update:
+                delta = reward + gamma * max Q(s_next) - Q(s, a)
+                Q(x, b) += alpha * delta * e(x, b) for every traced (x, b)
+            the visited (s, a) gets e = 1 (replacing traces), then all
+            traces decay by gamma * trace_decay. next_action is the action
+            about to be taken in s_next, an exploring (not greedy) one
+            ends the traces, so does None (end of the episode)
+            only the traces of recently visited pairs are kept: the ones
+            under TRACE_CUTOFF and the oldest beyond max_traces are dropped,
+            so a step costs the same on any maze size
+            returns the new Q(s, a)
+        """
+        qtable, actions = self.qtable, self.actions
+        delta = reward + self.gamma * max(qtable[s_next]) - qtable[s][a]
+        traces = self._traces
+        key = s * actions + a
+        traces[key] = 1.0
+        traces.move_to_end(key)
+        if len(traces) > self.max_traces:
+            traces.popitem(last=False)
+
+        step = self.alpha * delta
+        for traced, eligibility in traces.items():
+            state, action = divmod(traced, actions)
+            self._row_for_update(state)[action] += step * eligibility
+        new_q = qtable[s][a]
+
+        if next_action is None or (qtable[s_next][next_action]
+                                   < max(qtable[s_next])):
+            traces.clear()
+            return new_q
+        decay = self.gamma * self.trace_decay
+        for traced in traces:
+            traces[traced] *= decay
+        # the oldest traces are the smallest ones
+        while traces and next(iter(traces.values())) < TRACE_CUTOFF:
+            traces.popitem(last=False)
         return new_q
 
+    def reset_traces(self):
+        """ forgets all eligibility traces, ex. when an episode is cut off
+        """
+        self._traces.clear()
+
+    def getstate(self) -> dict:
+        """ what the learner keeps besides its table and settings: the
+            planning model and queue and the eligibility traces, made of
+            plain lists and numbers (can be stored as JSON)
+        """
+        return {
+            "model": [[key, s_next, reward] for key, (s_next, reward)
+                      in self._model.items()],
+            "predecessors": [[state, list(keys)] for state, keys
+                             in self._predecessors.items()],
+            "queue": [list(entry) for entry in self._queue],
+            "queued": [list(item) for item in self._queued.items()],
+            "planning_updates": self.planning_updates,
+            "traces": [list(item) for item in self._traces.items()],
+        }
+
+    def setstate(self, state: dict):
+        """ continues exactly where getstate() was taken """
+        self._model = {key: (s_next, reward)
+                       for key, s_next, reward in state["model"]}
+        self._predecessors = {s: dict.fromkeys(keys)
+                              for s, keys in state["predecessors"]}
+        # the heap is restored in its stored order, so it stays a heap
+        self._queue = [tuple(entry) for entry in state["queue"]]
+        self._queued = dict(state["queued"])
+        self.planning_updates = state["planning_updates"]
+        self._traces = OrderedDict(state["traces"])
+
+    def update_q_batch(self, s, a, s_next, r, done) -> np.ndarray:
+        """ batched update_q over arrays of transitions (numpy backend)
+            done marks terminal transitions, those do not look ahead:
+            Q(s, a) = (1 - alpha) * Q(s, a) + alpha * reward
+            a (s, a) pair showing up more than once in one batch is updated
+            from the same old value, the last one wins
+            returns the new Q values
+        """
+        self._require_numpy("update_q_batch")
+        import numpy as np
+        s = np.asarray(s)
+        a = np.asarray(a)
+        q_next = self.qtable[np.asarray(s_next)].max(axis=1)
+        q_error = np.asarray(r) + self.gamma * np.where(done, 0.0, q_next)
+        new_q = (1 - self.alpha) * self.qtable[s, a] + self.alpha * q_error
+        self.qtable[s, a] = new_q
+        return new_q
+
+    def save(self, path=None, maze=None, state: dict | None = None):
+        """ writes the table and the settings to path (default filename)
+            in one atomic step, see qtable_binary.save()
+        """
+        # qtable_binary builds on this module
+        import qtable_binary
+        qtable_binary.save(self, path, maze, state)
+
+    @classmethod
+    def load(cls, path, backend: str = "numpy", maze=None):
+        """ the learner saved at path and the training state saved with
+            it, see qtable_binary.load()
+        """
+        import qtable_binary
+        return qtable_binary.load(path, backend, maze)
+
     def make_qtable(self):
         """ intialize the QTable with 0 """
+        if self.backend == "numpy":
+            import numpy as np
+            return np.zeros((self.states, self.actions), dtype=self.dtype)
+        if self.backend == "sparse":
+            walls = None if self.walls is None else bytes(self.walls)
+            return SparseQTable(self.states, self.actions, walls)
         return [[0.0 for _ in range(self.actions)] for _ in range(self.states)]
 
+    def _require_numpy(self, method: str):
+        if self.backend != "numpy":
+            raise ValueError(f"{method} needs the numpy backend")
+
     def epsilon_greedy_action(self, state) -> int:
         """ pick an action acoording to current policy and table """
         exex_roll = random()
@@ -84,3 +338,21 @@ class QLearner:
 
         # base case - exploration or the policy not yet determined
         return randint(0, self.actions - 1)
+
+    def epsilon_greedy_actions(self, states) -> np.ndarray:
+        """ batched epsilon_greedy_action for an array of states
+            (numpy backend). ties between the best actions are broken at
+            random, not only the all-equal case
+        """
+        self._require_numpy("epsilon_greedy_actions")
+        import numpy as np
+        action_qs = self.qtable[np.asarray(states)]
+        count = len(action_qs)
+        # random weights on the best actions only, argmax picks one of them
+        is_best = action_qs == action_qs.max(axis=1, keepdims=True)
+        weights = np.where(is_best, self.rng.random(action_qs.shape), -1.0)
+        greedy = np.argmax(weights, axis=1)
+        explore = self.rng.random(count) < self.epsilon
+        return np.where(explore,
+                        self.rng.integers(0, self.actions, count),
+                        greedy)
@@ -0,0 +1,182 @@
+""" binary files for Q-tables, loaded by memory mapping
+
+    layout (little endian):
+        header  "<4sHHIIII"
+                magic b"QTBL", format version, dtype (0 float64,
+                1 float32), states, actions, length of the metadata,
+                length of the walls (0 or states)
+        meta    utf-8 JSON, padded with zeros to a multiple of 8:
+                the learners settings, its planning model, queue and
+                eligibility traces (QLearner.getstate()), the maze the
+                table was learned on and whatever training state the
+                caller hands in
+        table   states * actions values of dtype, row by row
+        walls   the QLearner.walls bytes, if it has any
+
+    loading maps the file copy-on-write and puts the table of a numpy
+    backed QLearner straight on the mapped pages, big tables load without
+    reading them. files are written through a temporary file, flushed to
+    disk and swapped in with os.replace(), a crash leaves the old file or
+    the new one, never a torn one
+
+    requires numpy
+"""
+from q_learner import QLearner
+from sparse_qtable import SparseQTable
+from zlib import crc32
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import numpy as np
+
+MAGIC = b"QTBL"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHIIII")
+DTYPES = ("float64", "float32")
+SETTINGS = ("alpha", "gamma", "epsilon", "planning_steps", "theta",
+            "trace_decay", "max_traces")
+
+
+def _padding(length: int, alignment: int) -> int:
+    return -length % alignment
+
+
+def maze_identity(maze) -> dict:
+    """ name, size, start, goal and a checksum of the walls and holes
+        (maze.version only counts edits within one process, it is stored
+        but not compared)
+    """
+    checksum = crc32(maze.wall_plane())
+    checksum = crc32(maze.hole_plane(), checksum)
+    return {"name": maze.name, "dim_x": maze.dim_x, "dim_y": maze.dim_y,
+            "start": list(maze.start), "goal": list(maze.goal),
+            "checksum": checksum, "version": maze.version}
+
+
+def random_state() -> list:
+    """ state of the global random module as JSON friendly lists """
+    version, internal, gauss = random.getstate()
+    return [version, list(internal), gauss]
+
+
+def set_random_state(state: list):
+    version, internal, gauss = state
+    random.setstate((version, tuple(internal), gauss))
+
+
+def dump(ql: QLearner, file, maze=None, state: dict | None = None):
+    """ writes the Q-table and settings of ql into file (opened as "wb")
+        maze is the maze it learned on, state any JSON friendly training
+        state (episode, random states, ...) to resume from
+    """
+    dtype = ql.dtype if ql.backend == "numpy" else "float64"
+    if ql.backend == "sparse":
+        table = ql.qtable.numpy()
+    else:
+        table = np.asarray(ql.qtable, dtype=dtype)
+    meta = {
+        "settings": {name: getattr(ql, name) for name in SETTINGS},
+        "rng": ql.rng.bit_generator.state,
+        "learner": ql.getstate(),
+        "maze": None if maze is None else maze_identity(maze),
+        "state": state,
+    }
+    meta = json.dumps(meta).encode("utf-8")
+    walls = b"" if ql.walls is None else bytes(ql.walls)
+    file.write(HEADER.pack(MAGIC, FORMAT_VERSION, DTYPES.index(dtype),
+                           ql.states, ql.actions, len(meta), len(walls)))
+    file.write(meta + bytes(_padding(len(meta), 8)))
+    file.write(table.astype(table.dtype.newbyteorder("<"), copy=False)
+               .tobytes())
+    file.write(walls)
+
+
+def save(ql: QLearner, path=None, maze=None, state: dict | None = None):
+    """ atomic dump() to path (default ql.filename): a temporary file is
+        written, synced and renamed over path
+    """
+    path = os.fspath(ql.filename if path is None else path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        dump(ql, file, maze, state)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+    if hasattr(os, "O_DIRECTORY"):
+        # the rename itself must reach the disk too
+        directory = os.open(os.path.dirname(os.path.abspath(path)),
+                            os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def load(path, backend: str = "numpy",
+         maze=None) -> tuple[QLearner, dict | None]:
+    """ the QLearner stored at path and the training state saved with it
+        the numpy backend works on the mapped file (copy-on-write, changes
+        never reach the file), the list backend gets a copy, the sparse
+        one rows for the states with a non zero value
+        with maze given, the file must have been learned on that maze
+
+        :raises
+            ValueError if the file is not a (valid) Q-table file or was
+            learned on another maze
+    """
+    with open(path, "rb") as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        except ValueError:
+            # mmap refuses empty files
+            raise ValueError("Not a Q-table file") from None
+
+    if len(buffer) < HEADER.size:
+        raise ValueError("Not a Q-table file")
+    (magic, version, dtype, states, actions,
+     meta_length, walls_length) = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a Q-table file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported Q-table file version: {version}")
+    if dtype >= len(DTYPES):
+        raise ValueError("Q-table file has an unknown dtype")
+    dtype = DTYPES[dtype]
+    table_offset = HEADER.size + meta_length + _padding(meta_length, 8)
+    count = states * actions
+    walls_offset = table_offset + count * np.dtype(dtype).itemsize
+    if (walls_length not in (0, states)
+            or len(buffer) != walls_offset + walls_length):
+        raise ValueError("Q-table file is truncated or corrupt")
+    meta = json.loads(bytes(buffer[HEADER.size:HEADER.size + meta_length]))
+
+    if maze is not None:
+        stored = meta["maze"]
+        identity = maze_identity(maze)
+        if stored is None or any(stored[key] != identity[key]
+                                 for key in identity if key != "version"):
+            raise ValueError("Q-table was learned on another maze")
+
+    walls = None
+    if walls_length:
+        walls = bytes(buffer[walls_offset:walls_offset + walls_length])
+    ql = QLearner(filename=os.fspath(path), states=states, actions=actions,
+                  backend=backend, dtype=dtype, walls=walls,
+                  **meta["settings"])
+    ql.rng.bit_generator.state = meta["rng"]
+    ql.setstate(meta["learner"])
+    table = np.frombuffer(buffer, dtype=np.dtype(dtype).newbyteorder("<"),
+                          count=count, offset=table_offset)
+    table = table.reshape(states, actions)
+    if backend == "numpy":
+        if sys.byteorder == "big":
+            table = table.astype(dtype)
+        ql.qtable = table
+    elif backend == "sparse":
+        ql.qtable = SparseQTable.from_numpy(table, walls)
+    else:
+        ql.qtable = table.tolist()
+    return ql, meta["state"]
@@ -0,0 +1,100 @@
+""" a Q-table in shared memory, for several processes learning at once
+
+    the table is one block of float64 (states * actions) in
+    multiprocessing.shared_memory. every process maps it and hands out
+    the rows as memoryviews, so qtable[s][a] reads and writes the shared
+    values in place, like the list backend of QLearner. put it in place
+    of a learners table:
+        ql.qtable = SharedQTable.attach(name, states, actions)
+    there are no locks (Hogwild style): a concurrent update can get lost,
+    Q-learning shrugs that off. the float64 values themselves are never
+    torn, they are written in one piece
+"""
+from __future__ import annotations
+from multiprocessing.shared_memory import SharedMemory
+
+ITEM_SIZE = 8
+
+
+class SharedQTable:
+    """
+    (states, actions) float64 table in a SharedMemory block
+    create() makes a new zeroed one, attach() maps an existing one by name
+    """
+
+    def __init__(self, memory: SharedMemory, states: int, actions: int,
+                 owner: bool):
+        if memory.size < states * actions * ITEM_SIZE:
+            raise ValueError("Shared memory block is too small for the table")
+        self.memory = memory
+        self.states = states
+        self.actions = actions
+        self.owner = owner
+        values = memory.buf[:states * actions * ITEM_SIZE].cast("d")
+        self.rows = [values[s * actions:(s + 1) * actions]
+                     for s in range(states)]
+        self._values = values
+
+    @classmethod
+    def create(cls, states: int, actions: int) -> SharedQTable:
+        """ a new table filled with 0, the caller owns it (see unlink()) """
+        if states < 1 or actions < 1:
+            raise ValueError("Need at least one state and one action")
+        memory = SharedMemory(create=True, size=states * actions * ITEM_SIZE)
+        # fresh blocks are zeroed on linux, not everywhere
+        memory.buf[:states * actions * ITEM_SIZE] = bytes(
+            states * actions * ITEM_SIZE)
+        return cls(memory, states, actions, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, states: int, actions: int) -> SharedQTable:
+        """ maps the table created under name by another process """
+        # worker processes started by multiprocessing share the resource
+        # tracker of the creator, it keeps the block until unlink()
+        return cls(SharedMemory(name=name), states, actions, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def __getitem__(self, state: int) -> memoryview:
+        return self.rows[state]
+
+    def __len__(self) -> int:
+        return self.states
+
+    def to_list(self) -> list[list[float]]:
+        """ copy of the table as a list of lists """
+        return [row.tolist() for row in self.rows]
+
+    def numpy(self):
+        """ (states, actions) numpy view of the table, no copy
+            requires numpy
+        """
+        import numpy as np
+        return np.frombuffer(self._values, dtype=np.float64).reshape(
+            self.states, self.actions)
+
+    def close(self):
+        """ unmaps the table in this process, rows and views taken from it
+            must be dropped first
+        """
+        for row in self.rows:
+            row.release()
+        self.rows = []
+        self._values.release()
+        self.memory.close()
+
+    def unlink(self):
+        """ removes the block for good, owner only, after close() """
+        if not self.owner:
+            raise ValueError("Only the creator can unlink a shared Q-table")
+        self.memory.unlink()
+
+    def __enter__(self) -> SharedQTable:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        if self.owner:
+            self.unlink()
@@ -0,0 +1,152 @@
+""" a Q-table that only holds rows for the states actually used
+
+    QLearner.make_qtable() allocates a row for every cell, walls included,
+    most of a big labyrinth is rows that are never read. here a flat index
+    map (one int32 per state, -1 = no row yet) points into blocks of
+    float64 rows. qtable[s][a] reads and writes like the list backend, a
+    state without a row reads as zeros and the first write allocates its
+    row (starting at 0). qtable.row_for_update(s) hands out the writable
+    row right away, the learner uses it to skip the stand-in row
+    with the walls of a maze given (for_maze()) walls never get a row,
+    they read as a shared row of zeros that can not be written to
+    the blocks have a fixed size, so rows handed out stay valid while new
+    ones are added
+"""
+from __future__ import annotations
+from array import array
+
+BLOCK_ROWS = 1024
+
+
+class _NewRow:
+    """ stand-in for the row of a state without one, reads as zeros and
+        allocates the row on the first write
+    """
+    __slots__ = ("_table", "_state")
+
+    def __init__(self, table: SparseQTable, state: int):
+        self._table = table
+        self._state = state
+
+    def _row(self) -> memoryview:
+        row = self._table._index[self._state]
+        if row < 0:
+            return self._table._zeros
+        return self._table._view(row)
+
+    def __getitem__(self, action):
+        return self._row()[action]
+
+    def __setitem__(self, action, value):
+        self._table.row_for_update(self._state)[action] = value
+
+    def __len__(self) -> int:
+        return self._table.actions
+
+    def __iter__(self):
+        return iter(self._row())
+
+    def tolist(self) -> list:
+        return self._row().tolist()
+
+
+class SparseQTable:
+    """
+    (states, actions) table, rows allocated on the first write
+    """
+
+    def __init__(self, states: int, actions: int, walls=None):
+        """ walls is an optional buffer of one byte per state, non zero
+            states never get a row (ex. Maze.wall_plane())
+        """
+        if states < 1 or actions < 1:
+            raise ValueError("Need at least one state and one action")
+        if walls is not None and len(walls) != states:
+            raise ValueError("Walls do not match the number of states")
+        self.states = states
+        self.actions = actions
+        self._index = array("i", [-1]) * states
+        self._walls = walls
+        self._blocks = []
+        self._views = []
+        self.rows = 0
+        self._zeros = memoryview(array("d", bytes(8 * actions))).toreadonly()
+
+    @classmethod
+    def for_maze(cls, maze, actions: int = 4) -> SparseQTable:
+        """ table for the cells of maze, walls get no rows """
+        return cls(maze.size, actions, walls=bytes(maze.wall_plane()))
+
+    def _allocate(self, state: int) -> int:
+        if self.rows % BLOCK_ROWS == 0:
+            block = array("d", bytes(8 * BLOCK_ROWS * self.actions))
+            self._blocks.append(block)
+            self._views.append(memoryview(block))
+        row = self.rows
+        self._index[state] = row
+        self.rows += 1
+        return row
+
+    def _view(self, row: int) -> memoryview:
+        offset = (row % BLOCK_ROWS) * self.actions
+        return self._views[row // BLOCK_ROWS][offset:offset + self.actions]
+
+    def __getitem__(self, state: int) -> memoryview | _NewRow:
+        """ the row of state, one without a row allocates it on the first
+            write, walls stay read only zeros
+        """
+        row = self._index[state]
+        if row < 0:
+            if self._walls is not None and self._walls[state]:
+                return self._zeros
+            return _NewRow(self, state)
+        return self._view(row)
+
+    def row_for_update(self, state: int) -> memoryview:
+        """ the writable row of state, allocated on first use """
+        row = self._index[state]
+        if row < 0:
+            if self._walls is not None and self._walls[state]:
+                return self._zeros
+            row = self._allocate(state)
+        return self._view(row)
+
+    def __len__(self) -> int:
+        return self.states
+
+    def __contains__(self, state: int) -> bool:
+        """ True if state has a row """
+        return self._index[state] >= 0
+
+    def nbytes(self) -> int:
+        """ memory of the index map and the row blocks """
+        return (self._index.itemsize * len(self._index)
+                + sum(block.itemsize * len(block) for block in self._blocks))
+
+    def numpy(self):
+        """ dense (states, actions) float64 copy, states without a row
+            are 0. requires numpy
+        """
+        import numpy as np
+        dense = np.zeros((self.states, self.actions))
+        if self.rows:
+            index = np.frombuffer(self._index, dtype=np.int32)
+            values = np.concatenate([np.frombuffer(block)
+                                     for block in self._blocks])
+            values = values.reshape(-1, self.actions)
+            used = index >= 0
+            dense[used] = values[index[used]]
+        return dense
+
+    @classmethod
+    def from_numpy(cls, table, walls=None) -> SparseQTable:
+        """ sparse copy of a dense (states, actions) table, only rows with
+            a non zero value are allocated. requires numpy
+        """
+        import numpy as np
+        states, actions = table.shape
+        sparse = cls(states, actions, walls)
+        for state in np.flatnonzero(np.any(table != 0, axis=1)):
+            values = array("d", table[state].tolist())
+            sparse.row_for_update(int(state))[:] = values
+        return sparse
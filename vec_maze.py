@@ -0,0 +1,192 @@
+""" vectorized maze environment
+    steps N agents on the same maze at once, all agent state lives in
+    numpy arrays instead of one MazeAgentAccess object per agent
+
+    requires numpy
+"""
+from helpers.grid_storage import hole_chance_from_plane
+from helpers.maze import Maze
+from maze_agent_access import (DEFAULT_REWARDS, LEFT, RIGHT, UP, DOWN,
+                               InvalidMazeAction)
+import numpy as np
+
+
+def build_transition_table(maze: Maze) -> np.ndarray:
+    """ next state for every (state, action) pair as an int64 array of
+        shape (maze.size, 4), actions in the LEFT, RIGHT, UP, DOWN order
+        blocked moves lead back into the same state
+    """
+    dim_x, dim_y = maze.dim_x, maze.dim_y
+    walls = np.frombuffer(maze.wall_plane(), dtype=np.uint8)
+    walls = walls.reshape(dim_y, dim_x).astype(bool)
+    states = np.arange(maze.size, dtype=np.int64).reshape(dim_y, dim_x)
+
+    table = np.repeat(states[:, :, np.newaxis], 4, axis=2)
+    # a move is open if the target is inside the grid and not a wall
+    left_open = ~walls[:, :-1]
+    right_open = ~walls[:, 1:]
+    up_open = ~walls[:-1, :]
+    down_open = ~walls[1:, :]
+    table[:, 1:, LEFT] = np.where(left_open, states[:, :-1], states[:, 1:])
+    table[:, :-1, RIGHT] = np.where(right_open, states[:, 1:], states[:, :-1])
+    table[1:, :, UP] = np.where(up_open, states[:-1, :], states[1:, :])
+    table[:-1, :, DOWN] = np.where(down_open, states[1:, :], states[:-1, :])
+
+    return table.reshape(maze.size, 4)
+
+
+def build_hole_chances(maze: Maze) -> np.ndarray:
+    """ hole chance per state as float64, 0 for start, goal and walls
+        (the cells where Maze.roll_hole never rolls)
+    """
+    holes = np.frombuffer(maze.hole_plane(), dtype=np.float32)
+    walls = np.frombuffer(maze.wall_plane(), dtype=np.uint8)
+    # the plane is float32, each distinct value is converted back once
+    values, inverse = np.unique(holes, return_inverse=True)
+    exact = np.array([hole_chance_from_plane(float(value))
+                      for value in values], dtype=np.float64)
+    hole_chances = exact[inverse]
+    hole_chances[walls != 0] = 0
+    hole_chances[maze.flatten(*maze.start)] = 0
+    hole_chances[maze.flatten(*maze.goal)] = 0
+    return hole_chances
+
+
+class VecMaze:
+    """
+    N agents on one maze, stepped together with an action vector
+    """
+
+    def __init__(self, maze: Maze, num_agents: int, *,
+                 seed: int | None = None,
+                 autoreset: bool = True,
+                 rewards: dict | None = None):
+        """ maze is shared, not copied. edits to it are picked up on the
+            next step() through Maze.version
+            autoreset puts agents back to the start once they hit the goal
+            or a hole (like trace_path(autoreset_on_holes=True)), otherwise
+            finished agents stay put until reset() is called for them
+        """
+        if num_agents < 1:
+            raise ValueError("Need at least one agent")
+
+        self.maze = maze
+        self.num_agents = num_agents
+        self.autoreset = autoreset
+        self.rewards = dict(DEFAULT_REWARDS if rewards is None else rewards)
+        self.rng = np.random.default_rng(seed)
+
+        self._transitions = None
+        self._hole_chances = None
+        self._start_state = -1
+        self._goal_state = -1
+        self._transitions_version = -1
+        self._refresh()
+
+        self._states = np.full(num_agents, self._start_state, dtype=np.int64)
+        self._in_hole = np.zeros(num_agents, dtype=bool)
+        self._at_goal = np.zeros(num_agents, dtype=bool)
+        self.episodes = np.zeros(num_agents, dtype=np.int64)
+        self.episode_steps = np.zeros(num_agents, dtype=np.int64)
+
+    @property
+    def states(self) -> int:
+        """ number of grid cells in the environment """
+        return self.maze.size
+
+    @property
+    def actions(self) -> int:
+        """ the number of possible actions an agent can take """
+        return 4
+
+    @property
+    def positions(self) -> np.ndarray:
+        """ current state (flat cell index) of every agent, read-only """
+        view = self._states.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def in_hole(self) -> np.ndarray:
+        """ hole flags per agent, read-only """
+        view = self._in_hole.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def at_goal(self) -> np.ndarray:
+        """ goal flags per agent, read-only """
+        view = self._at_goal.view()
+        view.flags.writeable = False
+        return view
+
+    def _refresh(self):
+        """ rebuild the lookup tables if the maze was edited """
+        if self._transitions_version == self.maze.version:
+            return
+        self._transitions = build_transition_table(self.maze)
+        self._hole_chances = build_hole_chances(self.maze)
+        self._start_state = self.maze.flatten(*self.maze.start)
+        self._goal_state = self.maze.flatten(*self.maze.goal)
+        self._transitions_version = self.maze.version
+
+    def reset(self, mask: np.ndarray | None = None) -> np.ndarray:
+        """ puts all agents (or the ones selected by the bool mask) back
+            to the start, returns the positions
+        """
+        self._refresh()
+        if mask is None:
+            mask = np.ones(self.num_agents, dtype=bool)
+        self._states[mask] = self._start_state
+        self._in_hole[mask] = False
+        self._at_goal[mask] = False
+        self.episode_steps[mask] = 0
+        return self.positions
+
+    def step(self, actions) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ moves every agent by its action id (LEFT, RIGHT, UP, DOWN)
+            returns (next_states, rewards, dones) as arrays of num_agents
+            next_states are the cells the agents moved into, so they can go
+            straight into a Q update. with autoreset, done agents start over
+            right after, positions then shows the start again
+
+            :raises
+                InvalidMazeAction for bad action ids or a wrong vector size
+        """
+        actions = np.asarray(actions)
+        if actions.shape != (self.num_agents,):
+            raise InvalidMazeAction(
+                f"Expected {self.num_agents} actions, got {actions.shape}")
+        if actions.size and (actions.min() < 0 or actions.max() > 3):
+            raise InvalidMazeAction("Action ids must be in [0:3]")
+        self._refresh()
+
+        # finished agents (only possible without autoreset) do not move
+        frozen = self._in_hole | self._at_goal
+        states = self._states
+        next_states = self._transitions[states, actions]
+        next_states[frozen] = states[frozen]
+        moved = next_states != states
+
+        # one bulk roll for everybody, only agents that entered a new cell
+        # can fall in, same as the single agent version
+        chances = self._hole_chances[next_states]
+        in_hole = moved & (self.rng.random(self.num_agents) < chances)
+        at_goal = moved & (next_states == self._goal_state)
+        in_hole |= self._in_hole
+        at_goal |= self._at_goal
+
+        rewards = np.where(moved, self.rewards["step"], self.rewards["wall"])
+        rewards[at_goal] = self.rewards["goal"]
+        rewards[in_hole] = self.rewards["hole"]
+        dones = in_hole | at_goal
+
+        self._states = next_states.copy()
+        self._in_hole = in_hole
+        self._at_goal = at_goal
+        self.episode_steps[~frozen] += 1
+        self.episodes[dones & ~frozen] += 1
+        if self.autoreset and dones.any():
+            self.reset(dones)
+
+        return next_states, rewards, dones